@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Cold-start benchmark for the Streamlit script.
+#
+#   python bench_imports.py            per-module import cost (python -X importtime)
+#   python bench_imports.py --tabs     first-paint time per tab in a fresh process,
+#                                      and which heavy libraries each tab pulled in
+#
+# Every measurement runs in a new interpreter, so nothing is already in sys.modules.
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODULES = [
+    "streamlit",
+    "pandas",
+    "numpy",
+    "plotly.graph_objects",
+    "folium",
+    "streamlit_folium",
+    "geopy.geocoders",
+    "google.generativeai",
+    "requests",
+]
+APP_MODULES = [
+    "cache", "instrumentation", "upstream", "geocoding", "profiles", "prompts", "forecast", "forecast_cache", "singleflight",
+    "fetcher", "providers", "nearby", "climate_stats", "climate_store", "charts", "weather_map",
+    "gemini_client", "forecast_service", "prefetch",
+]
+HEAVY = ["pandas", "numpy", "plotly", "folium", "streamlit_folium", "geopy", "google.generativeai"]
+TABS = ["Weather", "Settings", "Compare", "Historical Data"]
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_cost(module):
+    # (self µs, cumulative µs) for `import module` in a fresh interpreter
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        match = _IMPORTTIME.match(line)
+        if match and match.group(4) == module:
+            return int(match.group(1)), int(match.group(2))
+    return 0, 0
+
+
+_TAB_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - started
+at = AppTest.from_file({app!r}, default_timeout=120)
+started = time.perf_counter()
+at.run()
+tab = {tab!r}
+if tab != "Weather":
+    at.sidebar.radio[0].set_value(tab).run()
+elapsed = time.perf_counter() - started
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"tab": tab, "seconds": elapsed, "harness": harness, "heavy": heavy, "errors": len(at.exception)}}))
+"""
+
+
+def tab_first_paint(tab):
+    env = dict(os.environ, WEATHER_PREFETCH="0")
+    script = _TAB_SCRIPT.format(app=os.path.join(APP_DIR, "app.py"), tab=tab, heavy=HEAVY)
+    result = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, capture_output=True, text=True, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import and first-paint cost of the app")
+    parser.add_argument("--tabs", action="store_true", help="measure first paint per tab instead")
+    args = parser.parse_args()
+
+    if args.tabs:
+        print(f"{'tab':<18}{'first paint':>12}  heavy libraries loaded")
+        for tab in TABS:
+            report = tab_first_paint(tab)
+            flag = "  (errors)" if report["errors"] else ""
+            print(f"{tab:<18}{report['seconds'] * 1000:>10.0f}ms  {', '.join(report['heavy']) or '-'}{flag}")
+    else:
+        print(f"{'module':<24}{'self':>10}{'cumulative':>12}")
+        for module in MODULES + APP_MODULES:
+            own, cumulative = import_cost(module)
+            print(f"{module:<24}{own / 1000:>8.1f}ms{cumulative / 1000:>10.1f}ms")
@@ -0,0 +1,232 @@
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_upstreams
+
+# Load benchmark for the Streamlit app, fully offline.
+#
+#   python bench_load.py                          all flows, 20 sessions, 5 at a time
+#   python bench_load.py --flows weather --sessions 50 --concurrency 10
+#   python bench_load.py --first-token 2 --json results.json
+#
+# Starts the Gemini and Nominatim stand-ins from fake_upstreams.py, points the
+# app at them and drives Weather, Compare and Historical Data sessions through
+# Streamlit's AppTest, N at a time, in this process (so sessions share the
+# caches exactly like sessions of one server process do). Reports rerun latency
+# per step, throughput, upstream calls and memory per session; the app's own
+# stage timings (instrumentation.py) are printed alongside. A session that fails
+# is reported as an error (exit status 1) and the run carries on.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+FLOWS = ["weather", "compare", "historical"]
+API_KEY = "bench-key"
+
+_profile_ids = itertools.count()
+
+
+def configure(args, gemini_url, nominatim_url):
+    # Must run before any app module is imported: they read the environment at import
+    scratch = tempfile.mkdtemp(prefix="weather-bench-")
+    os.environ.update({
+        "GEMINI_ENDPOINT": gemini_url,
+        "WEATHER_NOMINATIM_URL": nominatim_url,
+        "WEATHER_NOMINATIM_DELAY": str(args.nominatim_delay),
+        "WEATHER_PREFETCH": "0",
+        "WEATHER_CACHE_DIR": scratch,
+        "WEATHER_CLIMATE_DIR": os.path.join(scratch, "climate"),
+        "WEATHER_PROFILE_DB": os.path.join(scratch, "profiles.sqlite"),
+    })
+
+
+def button(at, label):
+    return next(b for b in at.sidebar.button if b.label == label)
+
+
+def weather_flow(at, session, favorites, step):
+    step("load", at.run)
+    at.sidebar.text_input[0].input(API_KEY)
+    at.sidebar.checkbox[0].check()
+    step("api key", at.run)
+    at.sidebar.selectbox[0].select(favorites[session % len(favorites)])
+    step("select", at.run)
+    button(at, "Get Weather Info").click()
+    step("submit", at.run)
+    at.selectbox(key="language_choice").select("Spanish")
+    step("language", at.run)
+    at.sidebar.radio[1].set_value("Imperial (°F)")
+    step("units", at.run)
+
+
+def compare_flow(at, session, favorites, step):
+    step("load", at.run)
+    at.sidebar.radio[0].set_value("Compare")
+    step("navigate", at.run)
+    at.sidebar.multiselect[0].set_value(favorites[:3])
+    # One location per session that isn't in the gazetteer, so Nominatim is exercised
+    at.sidebar.text_input[0].input(f"Benchmark Town {session}")
+    step("select", at.run)
+    button(at, "Compare Weather").click()
+    step("submit", at.run)
+
+
+def historical_flow(at, session, favorites, step):
+    step("load", at.run)
+    at.sidebar.radio[0].set_value("Historical Data")
+    step("navigate", at.run)
+    at.sidebar.selectbox[0].select(favorites[session % len(favorites)])
+    step("select", at.run)
+    button(at, "View Historical Data").click()
+    step("submit", at.run)
+
+
+FLOW_FUNCTIONS = {"weather": weather_flow, "compare": compare_flow, "historical": historical_flow}
+
+
+def run_session(flow, session, favorites, samples, lock, timeout, flows=FLOWS):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    # Own profile per session, so one session's settings don't leak into the next
+    at.query_params["profile"] = f"bench-{next(_profile_ids)}"
+    errors = []
+
+    def step(name, run):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.setdefault((flow, name), []).append(elapsed)
+        errors.extend(e.value + "\n" + "\n".join(e.stack_trace) for e in at.exception)
+
+    # Each flow cycles through the favourites, so caches see repeats as well as misses.
+    # A session that blows up (AppTest sessions share one runtime and occasionally
+    # trip over each other) is recorded as an error, not allowed to abort the run.
+    try:
+        FLOW_FUNCTIONS[flow](at, session // len(flows), favorites, step)
+    except Exception:
+        errors.append(f"{flow} session {session}: {traceback.format_exc()}")
+    return at, errors
+
+
+def warm_up(timeout):
+    # Import the heavy libraries once, before sessions run concurrently: AppTest
+    # sessions share one test runtime, and streamlit_folium declares its component
+    # at import time, which fails if another session has just shut that runtime down
+    from streamlit.testing.v1 import AppTest
+
+    AppTest.from_string(
+        "import charts, weather_map, streamlit_folium, pandas, gemini_client",
+        default_timeout=timeout,
+    ).run()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_load(flows, sessions, concurrency, favorites, timeout):
+    samples = {}
+    lock = threading.Lock()
+    errors = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_session, flows[i % len(flows)], i, favorites, samples, lock, timeout, flows)
+                   for i in range(sessions)]
+        for future in futures:
+            errors.extend(future.result()[1])
+    return samples, errors, time.perf_counter() - started
+
+
+def session_memory(flows, sessions, favorites, timeout):
+    # Bytes still allocated per live session once the shared caches are warm
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    alive = [run_session(flows[i % len(flows)], i, favorites, {}, threading.Lock(), timeout, flows)[0]
+             for i in range(sessions)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del alive
+    return used / sessions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load benchmark for the weather app")
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=FLOWS)
+    parser.add_argument("--sessions", type=int, default=20, help="sessions to run (flows round-robin)")
+    parser.add_argument("--concurrency", type=int, default=5, help="sessions running at the same time")
+    parser.add_argument("--memory-sessions", type=int, default=5, help="sessions kept alive to measure memory (0 to skip)")
+    parser.add_argument("--first-token", type=float, default=fake_upstreams.FIRST_TOKEN)
+    parser.add_argument("--tokens-per-s", type=float, default=fake_upstreams.TOKENS_PER_S)
+    parser.add_argument("--geocode-latency", type=float, default=fake_upstreams.GEOCODE_LATENCY)
+    parser.add_argument("--nominatim-delay", type=float, default=0.0, help="client-side Nominatim rate limit delay")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+
+    gemini_url, nominatim_url = fake_upstreams.start(
+        first_token=args.first_token, tokens_per_s=args.tokens_per_s, geocode_latency=args.geocode_latency
+    )
+    configure(args, gemini_url, nominatim_url)
+    import instrumentation
+    import profiles
+
+    favorites = profiles.DEFAULT_PROFILE["favorite_locations"]
+    warm_up(args.timeout)
+    samples, errors, elapsed = run_load(args.flows, args.sessions, args.concurrency, favorites, args.timeout)
+    reruns = sum(len(values) for values in samples.values())
+    memory = session_memory(args.flows, args.memory_sessions, favorites, args.timeout) if args.memory_sessions else None
+
+    results = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "sessions_per_s": args.sessions / elapsed,
+        "reruns_per_s": reruns / elapsed,
+        "errors": errors,
+        "gemini_requests": fake_upstreams.FakeGeminiHandler.requests,
+        "nominatim_requests": fake_upstreams.FakeNominatimHandler.requests,
+        "memory_per_session": memory,
+        "steps": {
+            f"{flow}/{name}": {"count": len(values), "p50": percentile(values, 0.5),
+                               "p95": percentile(values, 0.95), "max": max(values)}
+            for (flow, name), values in samples.items()
+        },
+        "stages": instrumentation.snapshot()["stages"],
+    }
+
+    print(f"{'step':<24}{'count':>6}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name, step in results["steps"].items():
+        print(f"{name:<24}{step['count']:>6}{step['p50'] * 1000:>8.0f}ms{step['p95'] * 1000:>8.0f}ms{step['max'] * 1000:>8.0f}ms")
+    print(f"\n{args.sessions} sessions, {args.concurrency} concurrent: {elapsed:.1f}s, "
+          f"{results['sessions_per_s']:.2f} sessions/s, {results['reruns_per_s']:.1f} reruns/s")
+    print(f"upstream calls: {results['gemini_requests']} Gemini, {results['nominatim_requests']} Nominatim")
+    if memory is not None:
+        print(f"memory per session: {memory / 1024:.0f} KiB")
+    print(f"errors: {len(errors)}")
+    for error in errors[:5]:
+        # First and last line; --json has the whole traceback
+        lines = error.strip().splitlines()
+        print(f"  {lines[0]}" + (f" ... {lines[-1]}" if len(lines) > 1 else ""))
+
+    print(f"\n{'app stage':<24}{'count':>6}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, summary in results["stages"].items():
+        print(f"{stage:<24}{summary['count']:>6}{summary['p50'] * 1000:>8.1f}ms{summary['p95'] * 1000:>8.1f}ms"
+              f"{summary['p99'] * 1000:>8.1f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    # Thread-safe LRU cache where every entry carries its own expiry time.
+    # Shared by all Streamlit sessions in the process, so every access is locked.
+    # With stale > 0, expired entries are kept that many seconds longer for
+    # get_stale (a fallback while the upstream is down) and lookup (stale-while-
+    # revalidate); get() still misses.
+
+    def __init__(self, maxsize=1024, ttl=3600, stale=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale = stale
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            now = time.monotonic()
+            if expires_at < now:
+                if expires_at + self.stale < now:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key, default=None):
+        # The entry even if expired (within the stale window); not counted as a hit
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] + self.stale < time.monotonic():
+                return default
+            return entry[0]
+
+    def lookup(self, key, max_age=None):
+        # (value, age in seconds, expired) for a live entry, or for an expired one
+        # still in the stale window and, if given, younger than max_age; else None.
+        # Serving an expired entry counts as a (stale) hit.
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            now = time.monotonic()
+            if entry is _MISSING or entry[1] + self.stale < now:
+                self.misses += 1
+                return None
+            value, expires_at, stored_at = entry
+            expired = expires_at < now
+            if expired and max_age is not None and now - stored_at > max_age:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self.stale_hits += expired
+            return value, now - stored_at, expired
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = (value, now + ttl, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,147 @@
+import hashlib
+import pickle
+from functools import wraps
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import instrumentation
+from cache import TTLCache
+
+# Figure factory for every chart in the app. Figures are memoized per data
+# fingerprint and shared across reruns and sessions (Streamlit only reads them
+# when serializing). Numeric series are passed as float32 arrays, which plotly
+# encodes as base64 typed arrays instead of JSON number lists.
+
+# Trimmed plotly_dark: just the layout and trace defaults our charts use. The
+# full template ships colorscales and defaults for every trace type in each figure.
+_DARK = pio.templates["plotly_dark"]
+_LAYOUT_KEYS = [
+    "autotypenumbers", "colorway", "font", "hovermode", "hoverlabel",
+    "paper_bgcolor", "plot_bgcolor", "polar", "xaxis", "yaxis", "title",
+]
+_TRACE_KEYS = ["bar", "scatter", "scatterpolar"]
+DARK_TEMPLATE = go.layout.Template(
+    layout={key: _DARK.layout[key] for key in _LAYOUT_KEYS},
+    data={key: _DARK.data[key] for key in _TRACE_KEYS},
+)
+
+DEFAULT_MARGIN = dict(l=20, r=20, t=40, b=20)
+BLUE = 'rgba(0, 149, 255, 0.7)'
+ORANGE = 'rgba(255, 126, 0, 0.7)'
+POLLUTANT_COLORS = [
+    'rgba(255, 99, 132, 0.8)',
+    'rgba(54, 162, 235, 0.8)',
+    'rgba(255, 206, 86, 0.8)',
+    'rgba(75, 192, 192, 0.8)',
+    'rgba(153, 102, 255, 0.8)',
+    'rgba(255, 159, 64, 0.8)'
+]
+
+_figures = TTLCache(maxsize=256, ttl=3600)
+
+
+def series(values):
+    # Compact typed-array payload; None becomes NaN, which plotly draws as a gap
+    return np.asarray([np.nan if v is None else v for v in values], dtype=np.float32)
+
+
+def fingerprint(*parts):
+    return hashlib.blake2b(pickle.dumps(parts, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).hexdigest()
+
+
+def memoized(build):
+    @wraps(build)
+    def wrapper(*args, **kwargs):
+        key = (build.__name__, fingerprint(args, sorted(kwargs.items())))
+        figure = _figures.get(key)
+        if figure is None:
+            with instrumentation.timed(f"chart.{build.__name__}"):
+                figure = build(*args, **kwargs)
+            _figures.set(key, figure)
+        return figure
+    return wrapper
+
+
+def _layout(fig, height, margin=None, **layout):
+    fig.update_layout(template=DARK_TEMPLATE, height=height, margin=margin, **layout)
+    return fig
+
+
+@memoized
+def line_chart(x, y, title, xaxis_title, yaxis_title, name, color, width=4, height=400,
+               mode='lines+markers', marker_size=None, fill=None, margin=None):
+    fig = go.Figure(go.Scatter(
+        x=list(x),
+        y=series(y),
+        mode=mode,
+        name=name,
+        fill=fill,
+        line=dict(color=color, width=width),
+        marker=dict(size=marker_size) if marker_size else None
+    ))
+    return _layout(fig, height, margin, title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+
+
+@memoized
+def bar_chart(x, y, title=None, xaxis_title=None, yaxis_title=None, name=None, color=BLUE,
+              height=400, margin=None):
+    fig = go.Figure(go.Bar(
+        x=list(x),
+        y=series(y),
+        name=name,
+        marker_color=color
+    ))
+    return _layout(fig, height, margin, title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+
+
+@memoized
+def comparison_bars(values, title, yaxis_title, height=400):
+    # One bar trace per location so each gets its own legend entry and colour
+    fig = go.Figure([go.Bar(x=[name], y=series([value]), name=name) for name, value in values.items()])
+    return _layout(fig, height, title=title, yaxis_title=yaxis_title)
+
+
+@memoized
+def radar_chart(values, categories, height=500):
+    fig = go.Figure([
+        go.Scatterpolar(r=series(r), theta=list(categories), fill='toself', name=name)
+        for name, r in values.items()
+    ])
+    return _layout(fig, height, polar=dict(radialaxis=dict(visible=True, range=[0, 100])))
+
+
+@memoized
+def aqi_gauge(value, color, location):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = value,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': f"Air Quality Index in {location}", 'font': {'size': 24}},
+        delta = {'reference': 100, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
+        gauge = {
+            'axis': {'range': [None, 300], 'tickwidth': 1, 'tickcolor': "white"},
+            'bar': {'color': color},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 50], 'color': 'rgba(0, 255, 0, 0.3)'},
+                {'range': [50, 100], 'color': 'rgba(255, 255, 0, 0.3)'},
+                {'range': [100, 150], 'color': 'rgba(255, 165, 0, 0.3)'},
+                {'range': [150, 200], 'color': 'rgba(255, 0, 0, 0.3)'},
+                {'range': [200, 300], 'color': 'rgba(128, 0, 128, 0.3)'}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 100
+            }
+        }
+    ))
+    return _layout(fig, 300, dict(l=20, r=20, t=60, b=20))
+
+
+def stats():
+    return _figures.stats()
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Vectorized climate aggregates over a batch of daily series.
+#
+# A batch is a float array shaped (series, 366, columns): one row per
+# (location, year), days laid out on a leap-year calendar so every series shares
+# the same month boundaries (Feb 29 is NaN in common years). Every function
+# reduces the whole batch in a handful of NumPy passes - no Python loop over
+# locations, years or days.
+
+LEAP_DAYS = 366
+FEB_29 = 59  # zero-based day index of Feb 29 on the leap calendar
+MONTH_STARTS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Metric -> imperial (scale, offset) per column prefix; precip_chance is a percentage
+IMPERIAL = {
+    "temp": (9 / 5, 32),  # °C -> °F
+    "precip": (1 / 25.4, 0),  # mm -> in
+    "wind": (1 / 1.609344, 0),  # km/h -> mph
+}
+
+
+def from_leap_calendar(values, days):
+    # (366, columns) leap-calendar rows -> (days, columns), dropping Feb 29 for common years
+    if days == LEAP_DAYS:
+        return values
+    return np.delete(values, FEB_29, axis=-2)
+
+
+def unit_factors(columns, units):
+    # Broadcastable (scale, offset) vectors for converting the given metric columns
+    scale = np.ones(len(columns), dtype=np.float32)
+    offset = np.zeros(len(columns), dtype=np.float32)
+    if units == "imperial":
+        for i, column in enumerate(columns):
+            prefix = str(column).split("_")[0]
+            if prefix in IMPERIAL and column != "precip_chance":
+                scale[i], offset[i] = IMPERIAL[prefix]
+    return scale, offset
+
+
+def monthly_aggregates(batch, sum_columns=()):
+    # (series, 366, columns) -> (series, 12, columns): NaN-aware monthly means,
+    # or monthly totals for the column indices in sum_columns
+    valid = ~np.isnan(batch)
+    sums = np.add.reduceat(np.where(valid, batch, 0), MONTH_STARTS, axis=1)
+    observed = np.add.reduceat(valid, MONTH_STARTS, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        monthly = sums / observed
+    if len(sum_columns):
+        sum_columns = list(sum_columns)
+        monthly[:, :, sum_columns] = np.where(observed[:, :, sum_columns] > 0, sums[:, :, sum_columns], np.nan)
+    return monthly.astype(np.float32)
+
+
+def yearly_aggregates(batch, sum_columns=()):
+    # (series, 366, columns) -> (series, columns) yearly means / totals
+    valid = ~np.isnan(batch)
+    sums = np.where(valid, batch, 0).sum(axis=1)
+    observed = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        yearly = sums / observed
+    if len(sum_columns):
+        sum_columns = list(sum_columns)
+        yearly[:, sum_columns] = np.where(observed[:, sum_columns] > 0, sums[:, sum_columns], np.nan)
+    return yearly
+
+
+def extremes(batch, columns, reducers):
+    # For each (column index, "max"/"min") pair: value and leap-calendar day index
+    # per series. Returns two (series, len(columns)) arrays; day is -1 when a
+    # series has no observations for that column.
+    picked = batch[:, :, list(columns)]
+    sign = np.array([1 if r == "max" else -1 for r in reducers], dtype=picked.dtype)
+    signed = np.where(np.isnan(picked), -np.inf, picked * sign)
+    days = signed.argmax(axis=1)
+    values = np.take_along_axis(picked, days[:, None, :], axis=1)[:, 0, :]
+    empty = np.isneginf(np.take_along_axis(signed, days[:, None, :], axis=1)[:, 0, :])
+    days = np.where(empty, -1, days)
+    values = np.where(empty, np.nan, values)
+    return values, days
+
+
+def climatology(batch):
+    # Day-of-year mean over a stack of years: (years, 366, columns) -> (366, columns)
+    with np.errstate(invalid="ignore"):
+        valid = ~np.isnan(batch)
+        counts = valid.sum(axis=0)
+        sums = np.where(valid, batch, 0).sum(axis=0)
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def rolling_mean(batch, window):
+    # NaN-aware trailing rolling mean along the day axis via cumulative sums
+    valid = ~np.isnan(batch)
+    csum = np.cumsum(np.where(valid, batch, 0), axis=-2, dtype=np.float64)
+    ccount = np.cumsum(valid, axis=-2)
+    pad = [(0, 0)] * batch.ndim
+    pad[-2] = (1, 0)
+    csum = np.pad(csum, pad)
+    ccount = np.pad(ccount, pad)
+    days = batch.shape[-2]
+    end = np.arange(1, days + 1)
+    start = np.maximum(end - window, 0)
+    window_sum = np.take(csum, end, axis=-2) - np.take(csum, start, axis=-2)
+    window_count = np.take(ccount, end, axis=-2) - np.take(ccount, start, axis=-2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_count > 0, window_sum / window_count, np.nan)
+
+
+def rolling_anomalies(batch, baseline, window=30):
+    # Daily departure from the baseline climatology, smoothed with a rolling mean.
+    # batch: (series, 366, columns) or (366, columns); baseline: (366, columns)
+    return rolling_mean(batch - baseline, window)
@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import climate_stats
+from cache import TTLCache
+from geocoding import CACHE_DIR
+from providers import HISTORY_COLUMNS, get_provider, location_slug
+
+# Historical observations partitioned as <root>/<location slug>/<year>/:
+#   daily.npy      float32 (366, len(HISTORY_COLUMNS)) on the leap-year calendar of
+#                  climate_stats (Feb 29 is NaN in common years), NaN = missing day
+#   monthly.npy    float32 (12, len(HISTORY_COLUMNS)) precomputed at ingest
+#   summary.json   yearly means/totals, extremes with their dates, ingest metadata
+# Rendering a year reads only monthly.npy + summary.json; daily.npy is memory-mapped on demand.
+
+CLIMATE_DIR = os.environ.get("WEATHER_CLIMATE_DIR", os.path.join(CACHE_DIR, "climate"))
+# Bumped whenever the partition layout changes; older partitions are re-ingested
+FORMAT_VERSION = 2
+
+MONTHLY_COLUMNS = HISTORY_COLUMNS
+# Precipitation is aggregated as a total, everything else as a mean
+SUM_COLUMNS = [HISTORY_COLUMNS.index("precip")]
+
+EXTREMES = [
+    # (name, column, reducer)
+    ("Highest Temperature", "temp_max", "max"),
+    ("Lowest Temperature", "temp_min", "min"),
+    ("Highest Precipitation", "precip", "max"),
+    ("Strongest Wind", "wind_max", "max"),
+]
+
+
+def leap_day_index(dates):
+    # Row on the 366-day leap calendar for each date
+    dates = pd.DatetimeIndex(dates)
+    index = dates.dayofyear.to_numpy() - 1
+    return index + ((~dates.is_leap_year) & (dates.month > 2))
+
+
+def to_day_array(daily):
+    # Daily frame indexed by date -> dense (366, columns) float32 array
+    values = np.full((climate_stats.LEAP_DAYS, len(HISTORY_COLUMNS)), np.nan, dtype=np.float32)
+    if len(daily):
+        values[leap_day_index(daily.index)] = daily[HISTORY_COLUMNS].to_numpy(dtype=np.float32)
+    return values
+
+
+def summarize(batch, years):
+    # Yearly aggregates and dated extremes for a (series, 366, columns) batch in one pass
+    yearly = climate_stats.yearly_aggregates(batch, SUM_COLUMNS)
+    observed = (~np.isnan(batch[:, :, 0])).sum(axis=1)
+    extreme_values, extreme_days = climate_stats.extremes(
+        batch,
+        [HISTORY_COLUMNS.index(column) for _, column, _ in EXTREMES],
+        [reducer for _, _, reducer in EXTREMES],
+    )
+    calendar = pd.date_range("2000-01-01", periods=climate_stats.LEAP_DAYS, freq="D")
+    summaries = []
+    for i, year in enumerate(years):
+        summary = {
+            "year": int(year),
+            "days_observed": int(observed[i]),
+            "temp_mean": None,
+            "precip_total": None,
+            "extremes": [],
+        }
+        if observed[i]:
+            summary["temp_mean"] = float(yearly[i, HISTORY_COLUMNS.index("temp_mean")])
+            summary["precip_total"] = float(yearly[i, HISTORY_COLUMNS.index("precip")])
+            for k, (name, column, _) in enumerate(EXTREMES):
+                day = calendar[extreme_days[i, k]]
+                summary["extremes"].append({
+                    "event": name,
+                    "column": column,
+                    "value": float(extreme_values[i, k]),
+                    "date": date(int(year), day.month, day.day).isoformat(),
+                })
+        summaries.append(summary)
+    return summaries
+
+
+class ClimateStore:
+
+    def __init__(self, root=CLIMATE_DIR):
+        self.root = root
+        self._aggregates = TTLCache(maxsize=4096, ttl=24 * 3600)
+        self._lock = threading.Lock()
+
+    def _path(self, location, year):
+        return os.path.join(self.root, location_slug(location), str(year))
+
+    def ingest_many(self, partitions):
+        # partitions: [(location, year, daily frame)]. Aggregates for every partition
+        # are computed together on one (series, 366, columns) batch.
+        batch = np.stack([to_day_array(daily) for _, _, daily in partitions])
+        monthly = climate_stats.monthly_aggregates(batch, SUM_COLUMNS)
+        summaries = summarize(batch, [year for _, year, _ in partitions])
+        results = []
+        for i, (location, year, _) in enumerate(partitions):
+            summaries[i]["ingested"] = date.today().isoformat()
+            summaries[i]["complete"] = year < date.today().year
+            summaries[i]["format"] = FORMAT_VERSION
+            self._write(location, year, batch[i], monthly[i], summaries[i])
+            results.append((monthly[i], summaries[i]))
+        return results
+
+    def _write(self, location, year, values, monthly, summary):
+        # Write into a temp dir and swap it in, so readers never see a half-written partition
+        path = self._path(location, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{year}-", dir=os.path.dirname(path))
+        np.save(os.path.join(staging, "daily.npy"), values)
+        np.save(os.path.join(staging, "monthly.npy"), monthly)
+        with open(os.path.join(staging, "summary.json"), "w") as f:
+            json.dump(summary, f)
+        with self._lock:
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(staging, path)
+            self._aggregates.set((location_slug(location), year), (monthly, summary))
+
+    def is_fresh(self, location, year):
+        loaded = self._load(location, year)
+        if loaded is None:
+            return False
+        summary = loaded[1]
+        return summary["complete"] or summary["ingested"] == date.today().isoformat()
+
+    def _load(self, location, year):
+        key = (location_slug(location), year)
+        cached = self._aggregates.get(key)
+        if cached is not None:
+            return cached
+        path = self._path(location, year)
+        try:
+            monthly = np.load(os.path.join(path, "monthly.npy"))
+            with open(os.path.join(path, "summary.json")) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if summary.get("format") != FORMAT_VERSION:
+            return None
+        self._aggregates.set(key, (monthly, summary))
+        return monthly, summary
+
+    def monthly(self, location, year):
+        monthly, _ = self._load(location, year)
+        return pd.DataFrame(
+            monthly, index=pd.Index(climate_stats.MONTH_NAMES, name="month"), columns=MONTHLY_COLUMNS
+        )
+
+    def summary(self, location, year):
+        return self._load(location, year)[1]
+
+    def daily_array(self, location, year):
+        # Memory-mapped (366, columns) leap-calendar array
+        return np.load(os.path.join(self._path(location, year), "daily.npy"), mmap_mode="r")
+
+    def anomalies(self, location, year, baseline_years, column="temp_mean", window=30):
+        # Rolling departure of one year from the day-of-year mean of baseline_years
+        index = HISTORY_COLUMNS.index(column)
+        baseline = np.stack([self.daily_array(location, y)[:, index] for y in baseline_years])
+        series = self.daily_array(location, year)[:, index]
+        anomaly = climate_stats.rolling_anomalies(series[:, None], climate_stats.climatology(baseline)[:, None], window)
+        days = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D", name="date")
+        return pd.Series(climate_stats.from_leap_calendar(anomaly, len(days))[:, 0], index=days, name=column)
+
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = ClimateStore()
+    return _store
+
+
+def ensure_years(location, years, store=None, provider=None):
+    # Ingest (in one batch) every year that has no fresh partition yet
+    store = store or get_store()
+    stale = [year for year in years if not store.is_fresh(location, year)]
+    if stale:
+        provider = provider or get_provider()
+        store.ingest_many([(location, year, provider.history(location, year)) for year in stale])
+    return store
+
+
+def ensure_year(location, year, store=None, provider=None):
+    return ensure_years(location, [year], store, provider)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Bulk-ingest historical weather into the climate store")
+    parser.add_argument("locations", nargs="+")
+    parser.add_argument("--years", type=int, default=10, help="number of past years to ingest")
+    args = parser.parse_args()
+
+    this_year = date.today().year
+    years = list(range(this_year - args.years + 1, this_year + 1))
+    started = time.perf_counter()
+    store = get_store()
+    provider = get_provider()
+    store.ingest_many([
+        (location, year, provider.history(location, year))
+        for location in args.locations
+        for year in years
+    ])
+    print(f"Ingested {len(args.locations) * len(years)} partitions in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,176 @@
+import streamlit as st
+
+import geocoding
+import ui
+
+# Compare page. The last comparison is kept in session state and redrawn on
+# unrelated reruns; only the Compare button fetches again.
+
+def get_location_snapshot(location):
+    # Geocode plus current conditions for a single location (metric)
+    import nearby
+
+    lat, lon = geocoding.get_coordinates(location)
+    current = nearby.current_weather([location])[location]
+    if current is None:
+        raise LookupError("location not found")
+    snapshot = dict(current)
+    snapshot["coordinates"] = f"{lat:.2f}, {lon:.2f}" if lat is not None else "Unknown"
+    return snapshot
+
+def format_snapshots(comparison_data, units):
+    # Display table (one column per location) in the requested unit system
+    import pandas as pd
+    import providers
+
+    labels = providers.UNIT_LABELS[units]
+    frame = providers.convert_units(pd.DataFrame.from_dict(comparison_data, orient="index"), units)
+    return pd.DataFrame({
+        loc: {
+            "temp": f"{row['temp']:.0f}{labels['temp']}",
+            "humidity": f"{row['humidity']:.0f}%",
+            "wind": f"{row['wind_speed']:.0f} {labels['wind']}",
+            "precip": f"{row['precip_chance']:.0f}%",
+            "coordinates": row["coordinates"]
+        }
+        for loc, row in frame.iterrows()
+    })
+
+def weather_alerts(snapshot):
+    # Threshold-based alerts on metric current conditions
+    if snapshot["precip_chance"] >= 80 and snapshot["wind_speed"] >= 40:
+        return "Storm Warning"
+    if snapshot["precip_chance"] >= 80:
+        return "Heavy Rain"
+    if snapshot["wind_speed"] >= 40:
+        return "Strong Wind"
+    if snapshot["temp"] >= 35:
+        return "Heat Warning"
+    return None
+
+def compare_locations(locations, on_result=None):
+    # All locations are fetched concurrently, so latency is the slowest location rather than the sum.
+    # on_result(comparison_data, errors) is called after each location finishes for partial rendering.
+    import fetcher
+
+    comparison_data = {}
+    errors = {}
+    for loc, data, error in fetcher.fetch_all(locations, get_location_snapshot):
+        if error is None:
+            comparison_data[loc] = data
+        else:
+            errors[loc] = error
+        if on_result:
+            on_result(comparison_data, errors)
+    # Keep the user's selection order regardless of completion order
+    comparison_data = {loc: comparison_data[loc] for loc in locations if loc in comparison_data}
+    return comparison_data, errors
+
+def sidebar(profile):
+    st.title("🔍 Compare Locations")
+
+    # FEATURE 8: Location Comparison
+    st.subheader("Select locations to compare")
+
+    # Get all user's favorite locations
+    all_locations = profile["favorite_locations"]
+
+    # Any number of favourites, plus free-form extra locations
+    selected_locations = st.multiselect("Locations", all_locations, key="compare_locations")
+    extra_locations = st.text_input("Other locations (comma separated)", key="compare_extra")
+    for loc in extra_locations.split(","):
+        loc = loc.strip()
+        if loc and loc not in selected_locations:
+            selected_locations.append(loc)
+
+    compare_button = st.button("Compare Weather", width="stretch")
+
+    return {"locations": selected_locations, "submit": compare_button}
+
+def show_comparison(comparison_data, units):
+    import pandas as pd
+    import charts
+    import providers
+
+    unit_labels = providers.UNIT_LABELS[units]
+    selected_locations = list(comparison_data)
+
+    # Create bar chart for temperature comparison
+    display_data = providers.convert_units(pd.DataFrame.from_dict(comparison_data, orient="index"), units)
+    fig_temp_compare = charts.comparison_bars(
+        {loc: display_data.loc[loc, "temp"] for loc in selected_locations},
+        title="Temperature Comparison",
+        yaxis_title=f"Temperature ({unit_labels['temp']})",
+    )
+
+    ui.plotly_chart(fig_temp_compare)
+
+    # Create radar chart for full comparison
+    categories = ['Temperature', 'Humidity', 'Wind Speed', 'Precipitation']
+
+    radar_values = {}
+    for loc in selected_locations:
+        # Normalize values for radar chart
+        temp_value = comparison_data[loc]["temp"] * 9 / 5 + 32
+        humid_value = comparison_data[loc]["humidity"]
+        wind_value = display_data.loc[loc, "wind_speed"]
+        precip_value = comparison_data[loc]["precip_chance"]
+
+        # Normalize values between 0-100 (30-100°F)
+        temp_norm = min(100, max(0, ((temp_value - 30) / 70) * 100))
+
+        radar_values[loc] = [temp_norm, humid_value, wind_value, precip_value]
+
+    fig_radar = charts.radar_chart(radar_values, categories)
+
+    ui.plotly_chart(fig_radar)
+
+    # Weather alerts comparison
+    st.subheader("Weather Alerts")
+
+    for loc in selected_locations:
+        alert_type = weather_alerts(comparison_data[loc])
+        if alert_type:
+            st.warning(f"{loc}: {alert_type}")
+        else:
+            st.success(f"{loc}: No weather alerts")
+
+def main(profile, state):
+    ui.main_title("🔍 Weather Comparison")
+
+    selected_locations = state["locations"]
+    if state["submit"] and len(selected_locations) >= 2:
+        st.session_state.comparison = None
+    comparison = st.session_state.get("comparison", None)
+
+    if comparison is None and (not state["submit"] or len(selected_locations) < 2):
+        st.info("Please select at least 2 locations to compare from the sidebar.")
+        return
+    if comparison is not None:
+        selected_locations = comparison["locations"]
+
+    # Show comparison data
+    st.subheader(f"Comparing Weather: {', '.join(selected_locations)}")
+
+    units = profile["preferred_units"]
+
+    # Get comparison data, filling the table in as each location arrives
+    st.markdown("<div class='compare-table'>", unsafe_allow_html=True)
+    table_placeholder = st.empty()
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if comparison is None:
+        def show_partial(partial_data, errors):
+            table_placeholder.table(format_snapshots(partial_data, units))
+
+        with st.spinner(f"Fetching weather for {len(selected_locations)} locations..."):
+            comparison_data, compare_errors = compare_locations(selected_locations, on_result=show_partial)
+        comparison = st.session_state.comparison = {
+            "locations": selected_locations, "data": comparison_data, "errors": compare_errors
+        }
+    table_placeholder.table(format_snapshots(comparison["data"], units))
+
+    for loc, error in comparison["errors"].items():
+        st.warning(f"{loc}: could not fetch weather ({error})")
+
+    show_comparison(comparison["data"], units)
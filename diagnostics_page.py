@@ -0,0 +1,72 @@
+import streamlit as st
+
+import forecast_cache
+import instrumentation
+import prefetch
+import prompts
+import ui
+
+# Hidden Diagnostics page, listed in the navigation only with ?diagnostics=1.
+# Process-wide numbers: every session served by this process contributes.
+
+def sidebar(profile):
+    st.title("🩺 Diagnostics")
+    st.caption("Process-wide timings, cache hit ratios, token counts and upstream health")
+    st.button("Refresh", width="stretch")
+    return {}
+
+def main(profile, state):
+    import pandas as pd
+
+    ui.main_title("🩺 Diagnostics")
+    snapshot = instrumentation.snapshot()
+
+    st.subheader("Stage latency")
+    if snapshot["stages"]:
+        stages = pd.DataFrame.from_dict(snapshot["stages"], orient="index")
+        timings = ["mean", "p50", "p95", "p99", "max"]
+        stages[timings] = stages[timings] * 1000
+        st.dataframe(stages[["count"] + timings].round(1).rename(columns={t: f"{t} (ms)" for t in timings}),
+                     width="stretch")
+    else:
+        st.info("Nothing timed yet.")
+
+    st.subheader("Caches")
+    caches = pd.DataFrame.from_dict(snapshot["caches"], orient="index")
+    if not caches.empty:
+        caches["hit_ratio"] = (caches["hit_ratio"] * 100).round(1)
+        st.dataframe(caches.rename(columns={"hit_ratio": "hit ratio (%)"}), width="stretch")
+
+    st.subheader("Upstream")
+    health = pd.DataFrame.from_dict(snapshot["upstreams"], orient="index")
+    if not health.empty:
+        for name, row in health.iterrows():
+            if row["state"] != "closed":
+                st.warning(f"{name}: circuit {row['state'].replace('_', '-')}, failing fast and serving cached data")
+        st.dataframe(health, width="stretch")
+    col1, col2, col3 = st.columns(3)
+    counters = snapshot["counters"]
+    col1.metric("Gemini requests", counters.get("gemini_requests", 0))
+    col2.metric("Prompt tokens", counters.get("gemini_prompt_tokens", 0))
+    col3.metric("Output tokens", counters.get("gemini_output_tokens", 0))
+    budgets = instrumentation.budget_usage()
+    if budgets:
+        st.caption("Tokens per forecast budget (time frame / detail level / locations per batched request)")
+        rows = []
+        for label, usage in sorted(budgets.items()):
+            requests = usage["requests"] or 1
+            rows.append({"budget": label, "requests": usage["requests"],
+                         "avg prompt tokens": round(usage["prompt_tokens"] / requests),
+                         "avg output tokens": round(usage["output_tokens"] / requests),
+                         "max output tokens": prompts.label_budget(label),
+                         "truncated": usage["truncated"]})
+        st.dataframe(pd.DataFrame(rows).set_index("budget"), width="stretch")
+    st.json({"request coalescing": forecast_cache.flight_stats(), "prefetch": prefetch.stats(),
+             "batched request fallbacks": counters.get("gemini_batch_fallbacks", 0),
+             "background revalidations": {"done": counters.get("revalidations", 0),
+                                          "failed": counters.get("revalidation_errors", 0)}})
+
+    with st.expander("Prometheus metrics"):
+        if instrumentation.METRICS_PORT:
+            st.caption(f"Served on port {instrumentation.METRICS_PORT} at /metrics")
+        st.code(instrumentation.prometheus_text(), language="text")
@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import forecast
+
+# Local stand-ins for Gemini and Nominatim, for benchmarks and offline runs.
+#
+#   python fake_upstreams.py --first-token 0.8 --tokens-per-s 150
+#   GEMINI_ENDPOINT=http://127.0.0.1:8701 WEATHER_NOMINATIM_URL=http://127.0.0.1:8702 \
+#       streamlit run app.py
+#
+# The Gemini stand-in speaks the REST generateContent/streamGenerateContent API
+# and answers with a schema-valid forecast for the location(s) named in the prompt,
+# streamed with a first-token delay and a generation rate like the real model.
+# The Nominatim stand-in answers /search with stable made-up coordinates.
+
+GEMINI_PORT = 8701
+NOMINATIM_PORT = 8702
+FIRST_TOKEN = 0.8  # seconds before the first chunk
+TOKENS_PER_S = 150.0
+CHUNK_CHARS = 120
+CHARS_PER_TOKEN = 4
+GEOCODE_LATENCY = 0.2
+
+
+def _rng(*parts):
+    return random.Random(hashlib.sha256(repr(parts).encode("utf-8")).digest())
+
+
+def fake_forecast(prompt, location=None):
+    # A forecast shaped by the prompt: location, units and number of daily/hourly points
+    if location is None:
+        match = re.search(r"\*\*(.+?)\*\*", prompt)
+        location = match.group(1) if match else "somewhere"
+    daily = int((re.search(r'"daily": (\d+)', prompt) or [0, 1])[1])
+    hourly = int((re.search(r'"hourly": (\d+)', prompt) or [0, 0])[1])
+    rng = _rng(location, prompt.count("Fahrenheit"))
+    base = rng.uniform(-5, 30)
+    if "Fahrenheit" in prompt:
+        base = base * 9 / 5 + 32
+    condition = rng.choice(forecast.CONDITIONS)
+    return {
+        "summary": "\n".join(f"- {line}" for line in [
+            f"Weather for {location}: {condition.replace('_', ' ')}",
+            f"Temperature around {base:.0f}°, feels like {base - 2:.0f}°",
+            f"Humidity {rng.randint(30, 95)}%, chance of precipitation {rng.randint(0, 100)}%",
+            "This is a simulated forecast from the local Gemini stand-in.",
+        ]),
+        "condition": condition,
+        "temperature": round(base, 1),
+        "feels_like": round(base - 2, 1),
+        "humidity": rng.randint(30, 95),
+        "precip_chance": rng.randint(0, 100),
+        "wind_speed": rng.randint(0, 50),
+        "wind_direction": rng.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
+        "aqi": rng.randint(10, 180),
+        "sunrise": "06:12",
+        "sunset": "18:47",
+        "alerts": [],
+        "tips": ["Check the forecast again later today."],
+        "daily": [
+            {"date": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"][i % 7], "condition": rng.choice(forecast.CONDITIONS),
+             "temp_max": round(base + rng.uniform(0, 6), 1), "temp_min": round(base - rng.uniform(0, 6), 1),
+             "precip_chance": rng.randint(0, 100), "wind_speed": rng.randint(0, 50)}
+            for i in range(daily)
+        ],
+        "hourly": [
+            {"time": f"{(6 + 3 * i) % 24:02d}:00", "temperature": round(base + rng.uniform(-4, 4), 1),
+             "precip_chance": rng.randint(0, 100)}
+            for i in range(hourly)
+        ],
+    }
+
+
+def fake_answer(prompt):
+    # Batched prompts list their locations as "- **name**" lines
+    if '"forecasts"' not in prompt:
+        return fake_forecast(prompt)
+    locations = re.findall(r"^- \*\*(.+?)\*\*$", prompt, re.MULTILINE)
+    return {"forecasts": [{"location": location, **fake_forecast(prompt, location)} for location in locations]}
+
+
+def _response(text, prompt_tokens, output_tokens, final):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if final:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+    }
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    # Close-delimited responses, so a stream can be written as it is "generated"
+    protocol_version = "HTTP/1.0"
+    first_token = FIRST_TOKEN
+    tokens_per_s = TOKENS_PER_S
+    requests = 0
+
+    def do_POST(self):
+        type(self).requests += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        text = json.dumps(fake_answer(prompt), ensure_ascii=False)
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        output_tokens = len(text) // CHARS_PER_TOKEN
+        chunks = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+        chunk_delay = CHUNK_CHARS / CHARS_PER_TOKEN / self.tokens_per_s
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        time.sleep(self.first_token)
+        if ":streamGenerateContent" not in self.path:
+            time.sleep(chunk_delay * (len(chunks) - 1))
+            self.wfile.write(json.dumps(_response(text, prompt_tokens, output_tokens, True)).encode("utf-8"))
+            return
+        # The REST transport streams a JSON array of responses
+        self.wfile.write(b"[")
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(chunk_delay)
+                self.wfile.write(b",")
+            final = i == len(chunks) - 1
+            self.wfile.write(json.dumps(_response(chunk, prompt_tokens, output_tokens if final else 0, final)).encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"]")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeNominatimHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+    latency = GEOCODE_LATENCY
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        url = urlparse(self.path)
+        query = parse_qs(url.query).get("q", [""])[0]
+        time.sleep(self.latency)
+        results = []
+        if url.path == "/search" and query and "nowhere" not in query.casefold():
+            rng = _rng(query.casefold())
+            results.append({
+                "place_id": rng.randint(1, 10 ** 8),
+                "lat": f"{rng.uniform(-60, 70):.6f}",
+                "lon": f"{rng.uniform(-180, 180):.6f}",
+                "display_name": query,
+                "class": "place",
+                "type": "city",
+                "importance": 0.5,
+            })
+        data = json.dumps(results).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(handler, port, host="127.0.0.1"):
+    # Returns the running server; port 0 picks a free port (server.server_port)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True).start()
+    return server
+
+
+def start(gemini_port=0, nominatim_port=0, first_token=FIRST_TOKEN, tokens_per_s=TOKENS_PER_S,
+          geocode_latency=GEOCODE_LATENCY):
+    # (gemini_url, nominatim_url) of freshly started stand-ins
+    FakeGeminiHandler.first_token = first_token
+    FakeGeminiHandler.tokens_per_s = tokens_per_s
+    FakeNominatimHandler.latency = geocode_latency
+    gemini = serve(FakeGeminiHandler, gemini_port)
+    nominatim = serve(FakeNominatimHandler, nominatim_port)
+    return f"http://127.0.0.1:{gemini.server_port}", f"http://127.0.0.1:{nominatim.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local Gemini and Nominatim stand-ins")
+    parser.add_argument("--gemini-port", type=int, default=GEMINI_PORT)
+    parser.add_argument("--nominatim-port", type=int, default=NOMINATIM_PORT)
+    parser.add_argument("--first-token", type=float, default=FIRST_TOKEN, help="seconds before the first chunk")
+    parser.add_argument("--tokens-per-s", type=float, default=TOKENS_PER_S)
+    parser.add_argument("--geocode-latency", type=float, default=GEOCODE_LATENCY)
+    args = parser.parse_args()
+
+    gemini_url, nominatim_url = start(args.gemini_port, args.nominatim_port, args.first_token,
+                                      args.tokens_per_s, args.geocode_latency)
+    print(f"GEMINI_ENDPOINT={gemini_url} WEATHER_NOMINATIM_URL={nominatim_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,33 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# One bounded pool for the whole process so concurrent sessions can't spawn unbounded threads.
+MAX_WORKERS = int(os.environ.get("WEATHER_FETCH_WORKERS", "16"))
+DEFAULT_TIMEOUT = float(os.environ.get("WEATHER_FETCH_TIMEOUT", "15"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="weather-fetch")
+
+
+class FetchTimeout(Exception):
+    pass
+
+
+def fetch_all(items, fetch_one, timeout=DEFAULT_TIMEOUT):
+    # Runs fetch_one(item) for every item concurrently and yields (item, result, error)
+    # as each one finishes, so callers can render partial results. Items still running
+    # when the timeout expires are yielded with a FetchTimeout error.
+    deadline = time.monotonic() + timeout
+    pending = {_executor.submit(fetch_one, item): item for item in items}
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            error = future.exception()
+            yield item, (None if error else future.result()), error
+    for future, item in pending.items():
+        future.cancel()
+        yield item, None, FetchTimeout(f"Timed out after {timeout:.0f}s")
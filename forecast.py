@@ -0,0 +1,282 @@
+import json
+import re
+from dataclasses import dataclass, field
+
+# Structured forecast returned by Gemini. The response is parsed once into these
+# frozen records, which then drive the Forecast card, emoji, charts and translation.
+
+CONDITIONS = ["sunny", "partly_cloudy", "cloudy", "rain", "storm", "snow", "fog", "windy"]
+
+CONDITION_EMOJI = {
+    "sunny": "☀️",
+    "partly_cloudy": "🌤️",
+    "cloudy": "☁️",
+    "rain": "🌧️",
+    "storm": "⛈️",
+    "snow": "❄️",
+    "fog": "🌫️",
+    "windy": "💨",
+}
+
+# Key phrase shown in the Translation panel for each condition
+CONDITION_PHRASES = {
+    "sunny": "Sunny",
+    "partly_cloudy": "Cloudy",
+    "cloudy": "Cloudy",
+    "rain": "Rainy",
+    "storm": "Rainy",
+}
+
+_NUMBER = {"type": "number", "nullable": True}
+
+FORECAST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string", "description": "Markdown forecast for the user, bullet points"},
+        "condition": {"type": "string", "enum": CONDITIONS},
+        "temperature": _NUMBER,
+        "feels_like": _NUMBER,
+        "humidity": _NUMBER,
+        "precip_chance": _NUMBER,
+        "wind_speed": _NUMBER,
+        "wind_direction": {"type": "string", "nullable": True},
+        "aqi": {"type": "integer", "nullable": True},
+        "sunrise": {"type": "string", "nullable": True},
+        "sunset": {"type": "string", "nullable": True},
+        "alerts": {"type": "array", "items": {"type": "string"}},
+        "tips": {"type": "array", "items": {"type": "string"}},
+        "daily": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string"},
+                    "condition": {"type": "string", "enum": CONDITIONS},
+                    "temp_max": {"type": "number"},
+                    "temp_min": {"type": "number"},
+                    "precip_chance": {"type": "number"},
+                    "wind_speed": {"type": "number"},
+                },
+                "required": ["date", "condition", "temp_max", "temp_min", "precip_chance"],
+            },
+        },
+        "hourly": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "time": {"type": "string"},
+                    "temperature": {"type": "number"},
+                    "precip_chance": {"type": "number"},
+                },
+                "required": ["time", "temperature", "precip_chance"],
+            },
+        },
+    },
+    "required": ["summary", "condition", "tips", "daily", "hourly"],
+}
+
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": FORECAST_SCHEMA,
+}
+
+# Several locations in one request: {"forecasts": [forecast + "location", ...]}
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "forecasts": {
+            "type": "array",
+            "items": dict(
+                FORECAST_SCHEMA,
+                properties={"location": {"type": "string"}, **FORECAST_SCHEMA["properties"]},
+                required=["location"] + FORECAST_SCHEMA["required"],
+            ),
+        },
+    },
+    "required": ["forecasts"],
+}
+
+BATCH_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": BATCH_SCHEMA,
+}
+
+
+@dataclass(frozen=True)
+class DailyForecast:
+    date: str
+    condition: str
+    temp_max: float
+    temp_min: float
+    precip_chance: float
+    wind_speed: float = None
+
+
+@dataclass(frozen=True)
+class HourlyForecast:
+    time: str
+    temperature: float
+    precip_chance: float
+
+
+@dataclass(frozen=True)
+class Forecast:
+    summary: str
+    condition: str
+    temperature: float = None
+    feels_like: float = None
+    humidity: float = None
+    precip_chance: float = None
+    wind_speed: float = None
+    wind_direction: str = None
+    aqi: int = None
+    sunrise: str = None
+    sunset: str = None
+    alerts: tuple = ()
+    tips: tuple = ()
+    daily: tuple = ()
+    hourly: tuple = ()
+    structured: bool = field(default=True, compare=False)
+
+    @property
+    def emoji(self):
+        return CONDITION_EMOJI.get(self.condition, "🌤️")
+
+    @property
+    def phrase(self):
+        return CONDITION_PHRASES.get(self.condition)
+
+    def card_markdown(self):
+        parts = [self.summary.strip()]
+        if self.alerts:
+            parts.append("\n".join(f"- ⚠️ {alert}" for alert in self.alerts))
+        if self.tips:
+            parts.append("\n".join(f"- 💡 {tip}" for tip in self.tips))
+        return "\n\n".join(part for part in parts if part)
+
+    def temperature_series(self):
+        # (labels, values) for the chart from whichever of daily/hourly has more points
+        if len(self.daily) >= len(self.hourly):
+            return [d.date for d in self.daily], [d.temp_max for d in self.daily]
+        return [h.time for h in self.hourly], [h.temperature for h in self.hourly]
+
+    def precip_series(self):
+        if len(self.daily) >= len(self.hourly):
+            return [d.date for d in self.daily], [d.precip_chance for d in self.daily]
+        return [h.time for h in self.hourly], [h.precip_chance for h in self.hourly]
+
+
+def _pick(data, names):
+    return {name: data.get(name) for name in names if data.get(name) is not None}
+
+
+def forecast_from_dict(data):
+    daily = tuple(
+        DailyForecast(**_pick(d, ("date", "condition", "temp_max", "temp_min", "precip_chance", "wind_speed")))
+        for d in data.get("daily") or ()
+    )
+    hourly = tuple(
+        HourlyForecast(**_pick(h, ("time", "temperature", "precip_chance")))
+        for h in data.get("hourly") or ()
+    )
+    condition = data.get("condition")
+    if condition not in CONDITION_EMOJI:
+        condition = "partly_cloudy"
+    return Forecast(
+        summary=data.get("summary") or "",
+        condition=condition,
+        temperature=data.get("temperature"),
+        feels_like=data.get("feels_like"),
+        humidity=data.get("humidity"),
+        precip_chance=data.get("precip_chance"),
+        wind_speed=data.get("wind_speed"),
+        wind_direction=data.get("wind_direction"),
+        aqi=data.get("aqi"),
+        sunrise=data.get("sunrise"),
+        sunset=data.get("sunset"),
+        alerts=tuple(data.get("alerts") or ()),
+        tips=tuple(data.get("tips") or ()),
+        daily=daily,
+        hourly=hourly,
+    )
+
+
+def guess_condition(text):
+    # Keyword fallback for free-text answers, same precedence as the old emoji picker
+    text = text.lower()
+    for condition, words in (
+        ("rain", ("rain",)),
+        ("cloudy", ("cloud",)),
+        ("sunny", ("sunny", "clear")),
+        ("snow", ("snow",)),
+        ("storm", ("storm", "thunder")),
+        ("fog", ("fog", "mist")),
+    ):
+        if any(word in text for word in words):
+            return condition
+    return "partly_cloudy"
+
+
+def parse_forecast(text):
+    # Parse the model output once; if it isn't valid JSON keep the prose as the summary
+    # (or, for JSON cut off at max_output_tokens, whatever of the summary arrived)
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return forecast_from_dict(data)
+    except (ValueError, TypeError, AttributeError):
+        pass
+    summary = partial_summary(text) or text
+    return Forecast(summary=summary, condition=guess_condition(summary), structured=False)
+
+
+_SUMMARY_START = re.compile(r'"summary"\s*:\s*"')
+
+
+def partial_summary(buffer):
+    # Best-effort decode of the "summary" string from an incomplete JSON stream,
+    # so the card can be filled in while the rest of the payload is still arriving.
+    match = _SUMMARY_START.search(buffer)
+    if not match:
+        return ""
+    raw = buffer[match.end():]
+    escaped = False
+    for index, ch in enumerate(raw):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            raw = raw[:index]
+            break
+    else:
+        # Drop an escape sequence cut off mid-chunk
+        if escaped:
+            raw = raw[:-1]
+        raw = re.sub(r"\\u[0-9a-fA-F]{0,3}$", "", raw)
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return raw.replace("\\n", "\n")
+
+
+def parse_batch(text, locations):
+    # {location: Forecast} for the requested locations found in a batched answer,
+    # matched by name (case-insensitive), else by position. Locations missing from
+    # the answer are left out; raises ValueError if it isn't a batch at all.
+    data = json.loads(text)
+    items = data.get("forecasts") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("not a batched forecast")
+    wanted = {location.strip().casefold(): location for location in locations}
+    forecasts = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        location = wanted.get(str(item.get("location") or "").strip().casefold())
+        if location is None and len(items) == len(locations):
+            location = locations[index]
+        if location is not None and location not in forecasts:
+            forecasts[location] = forecast_from_dict(item)
+    return forecasts
@@ -0,0 +1,213 @@
+import argparse
+import dataclasses
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import forecast_service
+import gemini_client
+import instrumentation
+import prompts
+import upstream
+
+# Headless batch forecasts: a file of locations in, one JSON line per location out
+# as soon as it is ready (completion order). Runs as a CLI or as a small HTTP
+# endpoint; both share the forecast cache and request coalescing with the app.
+#
+#   python forecast_batch.py cities.txt -o forecasts.jsonl --concurrency 8 --batch-size 5
+#   python forecast_batch.py --serve --port 8600
+#   curl --data-binary @cities.txt "localhost:8600/forecasts?units=imperial"
+#   curl localhost:8600/metrics          (Prometheus text, see instrumentation.py)
+
+DEFAULT_CONCURRENCY = int(os.environ.get("WEATHER_BATCH_CONCURRENCY", "8"))
+RETRIES = 2  # extra attempts per location after gemini_client's own retry deadline
+RETRY_BACKOFF = 5.0
+
+
+def read_locations(lines):
+    # One location per line; blank lines and "#" comments are skipped, duplicates dropped
+    locations = (line.split("#", 1)[0].strip() for line in lines)
+    return list(dict.fromkeys(location for location in locations if location))
+
+
+def forecast_record(model, location, time_frame, units, detail_level, retries=RETRIES):
+    record = {"location": location, "time_frame": time_frame, "units": units, "detail_level": detail_level}
+    for attempt in range(retries + 1):
+        try:
+            weather, cached = forecast_service.get_forecast(model, location, time_frame, units, detail_level)
+        except gemini_client.RETRYABLE_ERRORS + (upstream.UpstreamUnavailable,) as e:
+            if attempt == retries:
+                record["error"] = f"{type(e).__name__}: {e}"
+                return record
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            return record
+        else:
+            record["cached"] = cached
+            record["forecast"] = dataclasses.asdict(weather)
+            return record
+
+
+def forecast_records(model, locations, time_frame, units, detail_level, batch_size=forecast_service.BATCH_SIZE):
+    # Several locations in one batched Gemini request; if that request fails each
+    # location is retried on its own
+    if len(locations) == 1:
+        return [forecast_record(model, locations[0], time_frame, units, detail_level)]
+    try:
+        forecasts = forecast_service.get_forecasts(model, locations, time_frame, units, detail_level,
+                                                   batch_size=batch_size)
+    except Exception:
+        return [forecast_record(model, location, time_frame, units, detail_level) for location in locations]
+    return [
+        {"location": location, "time_frame": time_frame, "units": units, "detail_level": detail_level,
+         "cached": cached, "forecast": dataclasses.asdict(weather)}
+        for location, (weather, cached) in forecasts.items()
+    ]
+
+
+def iter_forecasts(model, locations, time_frame="Current weather", units="metric", detail_level="detailed",
+                   concurrency=DEFAULT_CONCURRENCY, batch_size=forecast_service.BATCH_SIZE):
+    # Yields records in completion order with at most `concurrency` requests (of up
+    # to batch_size locations each) in flight, submitting lazily so thousands of
+    # locations don't queue up at once
+    size = prompts.batch_size(time_frame, detail_level, batch_size)
+    locations = iter(locations)
+    chunks = iter(lambda: list(itertools.islice(locations, size)), [])
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(forecast_records, model, chunk, time_frame, units, detail_level, size))
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(executor.submit(forecast_records, model, chunk, time_frame, units, detail_level, size))
+
+
+def batch_options(time_frame, units, detail_level):
+    if time_frame not in prompts.TIME_FRAMES:
+        raise ValueError(f"time_frame must be one of {prompts.TIME_FRAMES}")
+    if units not in prompts.UNITS_TEXT:
+        raise ValueError(f"units must be one of {list(prompts.UNITS_TEXT)}")
+    if detail_level not in ("detailed", "brief"):
+        raise ValueError("detail_level must be 'detailed' or 'brief'")
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    # POST /forecasts  body: locations (one per line), query: time_frame, units,
+    # detail_level, concurrency, batch_size. Responds with streamed application/x-ndjson.
+    protocol_version = "HTTP/1.0"
+    model = None
+    max_concurrency = DEFAULT_CONCURRENCY
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/metrics":
+            data = instrumentation.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/forecasts":
+            self._send_json(404, {"error": "not found"})
+            return
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        time_frame = query.get("time_frame", "Current weather")
+        units = query.get("units", "metric")
+        detail_level = query.get("detail_level", "detailed")
+        try:
+            batch_options(time_frame, units, detail_level)
+            concurrency = max(1, min(int(query.get("concurrency", self.max_concurrency)), self.max_concurrency))
+            batch_size = max(1, int(query.get("batch_size", forecast_service.BATCH_SIZE)))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        locations = read_locations(body.splitlines())
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for record in iter_forecasts(self.model, locations, time_frame, units, detail_level, concurrency, batch_size):
+            self.wfile.write((json.dumps(record) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(model, host, port, concurrency):
+    BatchHandler.model = model
+    BatchHandler.max_concurrency = concurrency
+    server = ThreadingHTTPServer((host, port), BatchHandler)
+    print(f"Serving batch forecasts on http://{host}:{port}/forecasts", file=sys.stderr)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate forecasts for many locations as JSON lines")
+    parser.add_argument("locations_file", nargs="?", help="file with one location per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="write JSONL here instead of stdout")
+    parser.add_argument("--time-frame", default="Current weather", choices=prompts.TIME_FRAMES)
+    parser.add_argument("--units", default="metric", choices=list(prompts.UNITS_TEXT))
+    parser.add_argument("--brief", action="store_true", help="request brief instead of detailed forecasts")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=forecast_service.BATCH_SIZE,
+                        help="locations per Gemini request (1 disables batching)")
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY", ""), help="defaults to $GEMINI_API_KEY")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP endpoint instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("a Gemini API key is required (--api-key or GEMINI_API_KEY)")
+    model = gemini_client.get_model(args.api_key)
+    if args.serve:
+        serve(model, args.host, args.port, args.concurrency)
+        sys.exit(0)
+    if not args.locations_file:
+        parser.error("locations_file is required unless --serve is given")
+
+    if args.locations_file == "-":
+        locations = read_locations(sys.stdin)
+    else:
+        with open(args.locations_file, encoding="utf-8") as f:
+            locations = read_locations(f)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    failed = 0
+    try:
+        for record in iter_forecasts(model, locations, args.time_frame, args.units,
+                                     "brief" if args.brief else "detailed", args.concurrency, args.batch_size):
+            failed += "error" in record
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(locations)} locations ({failed} failed) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
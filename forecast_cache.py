@@ -0,0 +1,127 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import instrumentation
+
+from cache import TTLCache
+from geocoding import normalize_location
+from singleflight import SingleFlight
+
+# Shared by every session in the process: identical questions hit Gemini once per TTL.
+#
+# Stale-while-revalidate: once an entry's TTL has passed it is still served
+# (with its age shown) until its hard expiry, while a background refresh
+# replaces it, so only the first visitor after the hard expiry waits for
+# Gemini. Hard expiry is HARD_EXPIRY_FACTOR times the TTL for forecasts and
+# AIR_QUALITY_HARD_EXPIRY for air quality readings.
+FORECAST_TTLS = {
+    "Current weather": 10 * 60,
+    "Today's forecast": 30 * 60,
+    "24-hour forecast": 60 * 60,
+    "3-day forecast": 2 * 3600,
+    "Weekly forecast": 3 * 3600,
+}
+DEFAULT_TTL = 30 * 60
+MAX_ENTRIES = 512
+AIR_QUALITY_TTL = 30 * 60
+HARD_EXPIRY_FACTOR = float(os.environ.get("WEATHER_HARD_EXPIRY_FACTOR", "3"))
+AIR_QUALITY_HARD_EXPIRY = float(os.environ.get("WEATHER_AIR_QUALITY_HARD_EXPIRY", str(2 * 3600)))
+# How long an expired forecast may still be shown while Gemini is unavailable
+STALE_TTL = float(os.environ.get("WEATHER_STALE_TTL", str(6 * 3600)))
+REFRESH_WORKERS = int(os.environ.get("WEATHER_REVALIDATE_WORKERS", "2"))
+
+_cache = TTLCache(maxsize=MAX_ENTRIES, ttl=DEFAULT_TTL,
+                  stale=max(STALE_TTL, max(FORECAST_TTLS.values()) * (HARD_EXPIRY_FACTOR - 1)))
+_air_quality = TTLCache(maxsize=MAX_ENTRIES, ttl=AIR_QUALITY_TTL, stale=max(0, AIR_QUALITY_HARD_EXPIRY - AIR_QUALITY_TTL))
+# Concurrent misses for the same forecast key share one Gemini call
+flights = SingleFlight()
+
+_refresh_lock = threading.Lock()
+_refreshing = set()
+_refresh_executor = None
+
+
+def forecast_key(location, time_frame, units_text, detail_level, now=None):
+    # The date bucket keeps "today"/"weekly" answers from leaking into the next day
+    date_bucket = (now or datetime.now()).strftime("%Y-%m-%d")
+    return (normalize_location(location), time_frame, units_text, detail_level, date_bucket)
+
+
+def ttl_for(time_frame):
+    return FORECAST_TTLS.get(time_frame, DEFAULT_TTL)
+
+
+def hard_expiry(time_frame):
+    return ttl_for(time_frame) * HARD_EXPIRY_FACTOR
+
+
+def get(key):
+    return _cache.get(key)
+
+
+def get_stale(key):
+    return _cache.get_stale(key)
+
+
+def lookup(key, stale_ok=False):
+    # (forecast, age in seconds, expired) up to the hard expiry, or with stale_ok
+    # for as long as expired entries are kept (Gemini unavailable); else None
+    return _cache.lookup(key, max_age=None if stale_ok else hard_expiry(key[1]))
+
+
+def put(key, value, budget=None):
+    # A forecast that didn't parse (typically cut off at max_output_tokens) has no
+    # numbers for the charts: show it to the asker but don't serve it to everyone
+    if not value.structured:
+        if budget is not None:
+            instrumentation.count("gemini_budget_truncated", budget=budget)
+        return
+    _cache.set(key, value, ttl=ttl_for(key[1]))
+
+
+def stats():
+    return _cache.stats()
+
+
+def flight_stats():
+    return flights.stats()
+
+
+def lookup_air_quality(location):
+    # (reading, age in seconds, expired), served until AIR_QUALITY_HARD_EXPIRY
+    return _air_quality.lookup(normalize_location(location), max_age=AIR_QUALITY_HARD_EXPIRY)
+
+
+def put_air_quality(location, reading):
+    _air_quality.set(normalize_location(location), reading)
+
+
+def air_quality_stats():
+    return _air_quality.stats()
+
+
+def revalidate(key, refresh):
+    # Run refresh() in the background to replace an expired entry, once per key
+    # however many sessions are being served the stale value meanwhile
+    global _refresh_executor
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="revalidate")
+    _refresh_executor.submit(_revalidate, key, refresh)
+
+
+def _revalidate(key, refresh):
+    try:
+        refresh()
+        instrumentation.count("revalidations")
+    except Exception:
+        # The stale entry stays until its hard expiry; the next visitor retries
+        instrumentation.count("revalidation_errors")
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
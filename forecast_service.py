@@ -0,0 +1,103 @@
+import os
+from datetime import datetime
+from functools import partial
+
+import forecast
+import forecast_cache
+import instrumentation
+import prompts
+
+# Forecasts without Streamlit: the same prompt, cache key, cache and request
+# coalescing as the Weather tab, for the prefetcher and the batch entry points.
+#
+# get_forecasts asks for up to BATCH_SIZE locations in one Gemini request and
+# splits the answer into the same per-location cache entries; locations the
+# answer doesn't cover (or an answer that doesn't parse) fall back to one
+# request each.
+
+BATCH_SIZE = int(os.environ.get("WEATHER_GEMINI_BATCH", "5"))
+
+
+def forecast_request(location, time_frame, units, detail_level, now=None):
+    # (cache key, prompt, generation config) for a forecast; units is the profile unit system
+    now = now or datetime.now()
+    prompt = prompts.forecast_prompt(location, time_frame, units, detail_level, now)
+    key = forecast_cache.forecast_key(location, time_frame, prompts.UNITS_TEXT[units][0], detail_level, now)
+    return key, prompt, prompts.generation_config(time_frame, detail_level)
+
+
+def get_forecast(model, location, time_frame="Current weather", units="metric", detail_level="detailed",
+                 refresh=False):
+    # Returns (Forecast, cached). Upstream errors are retried by gemini_client.generate;
+    # while Gemini is unavailable an expired forecast is served if there is one.
+    # An expired entry within its hard expiry is returned at once and refreshed in
+    # the background.
+    import gemini_client
+    import upstream
+
+    key, prompt, config = forecast_request(location, time_frame, units, detail_level)
+    if not refresh:
+        entry = forecast_cache.lookup(key)
+        if entry is not None:
+            weather, _, expired = entry
+            if expired:
+                forecast_cache.revalidate(key, partial(get_forecast, model, location, time_frame, units,
+                                                       detail_level, refresh=True))
+            return weather, True
+
+    def fetch(publish):
+        budget = prompts.budget_label(time_frame, detail_level)
+        response = gemini_client.generate(model, prompt, generation_config=config, budget=budget)
+        weather = forecast.parse_forecast(response.text)
+        forecast_cache.put(key, weather, budget)
+        return weather, None
+
+    try:
+        (weather, _), _ = forecast_cache.flights.do(key, fetch)
+    except upstream.UpstreamUnavailable:
+        weather = None if refresh else forecast_cache.get_stale(key)
+        if weather is None:
+            raise
+        return weather, True
+    return weather, False
+
+
+def get_forecasts(model, locations, time_frame="Current weather", units="metric", detail_level="detailed",
+                  refresh=False, batch_size=BATCH_SIZE):
+    # {location: (Forecast, cached)}; upstream errors of a batched request propagate
+    import gemini_client
+
+    now = datetime.now()
+    requests = {location: forecast_request(location, time_frame, units, detail_level, now) for location in locations}
+    results = {}
+    missing = []
+    for location, (key, _, _) in requests.items():
+        weather = None if refresh else forecast_cache.get(key)
+        if weather is not None:
+            results[location] = weather, True
+        else:
+            missing.append(location)
+
+    size = prompts.batch_size(time_frame, detail_level, batch_size)
+    for start in range(0, len(missing), size):
+        chunk = missing[start:start + size]
+        if len(chunk) > 1:
+            budget = prompts.budget_label(time_frame, detail_level, len(chunk))
+            response = gemini_client.generate(
+                model, prompts.batch_prompt(chunk, time_frame, units, detail_level, now),
+                generation_config=prompts.batch_generation_config(time_frame, detail_level, len(chunk)),
+                budget=budget,
+            )
+            try:
+                forecasts = forecast.parse_batch(response.text, chunk)
+            except (ValueError, TypeError, AttributeError):
+                forecasts = {}
+            for location, weather in forecasts.items():
+                forecast_cache.put(requests[location][0], weather, budget)
+                results[location] = weather, False
+        for location in chunk:
+            if location not in results:
+                if len(chunk) > 1:
+                    instrumentation.count("gemini_batch_fallbacks")
+                results[location] = get_forecast(model, location, time_frame, units, detail_level, refresh)
+    return {location: results[location] for location in locations}
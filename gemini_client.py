@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+import time
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as api_exceptions
+from google.api_core import gapic_v1
+from google.api_core import retry as api_retry
+
+import instrumentation
+import upstream
+from cache import TTLCache
+
+# One configured model (and its gRPC channel) per API key, shared by all sessions.
+# genai.configure() is process-global, so it is deliberately not used here: two
+# sessions with different keys would otherwise overwrite each other's client.
+MODEL_NAME = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+REQUEST_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", "30"))
+RETRY_INITIAL = float(os.environ.get("GEMINI_RETRY_INITIAL", "0.5"))
+RETRY_MAXIMUM = float(os.environ.get("GEMINI_RETRY_MAXIMUM", "8"))
+RETRY_MULTIPLIER = 2.0
+RETRY_DEADLINE = float(os.environ.get("GEMINI_RETRY_DEADLINE", "45"))
+# Request rate towards Gemini per API key (0 for no limit); a request waits at
+# most GEMINI_RATE_WAIT seconds for its turn before failing fast
+REQUESTS_PER_MINUTE = float(os.environ.get("GEMINI_RPM", "60"))
+RATE_WAIT = float(os.environ.get("GEMINI_RATE_WAIT", "10"))
+# Alternative API endpoint (e.g. "http://127.0.0.1:8701" for fake_upstreams.py), spoken over REST
+ENDPOINT = os.environ.get("GEMINI_ENDPOINT", "")
+
+RETRYABLE_ERRORS = (
+    api_exceptions.ResourceExhausted,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+)
+
+_models = TTLCache(maxsize=64, ttl=24 * 3600)
+_lock = threading.Lock()
+
+
+def key_hash(api_key):
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def guard(api_key):
+    # Quota and 429s are per API key, so each key gets its own rate limit and
+    # circuit breaker (upstream.py); errors left after the retries count against it
+    return upstream.register(
+        f"gemini:{key_hash(api_key)[:8]}", rate=REQUESTS_PER_MINUTE / 60,
+        burst=max(1, int(REQUESTS_PER_MINUTE / 6)), max_wait=RATE_WAIT, failures=RETRYABLE_ERRORS,
+    )
+
+
+def make_model(api_key, model_name=MODEL_NAME):
+    model = genai.GenerativeModel(model_name=model_name)
+    # GenerativeModel lazily falls back to the global default client; give it its own instead
+    client_options = {"api_key": api_key}
+    transport = None
+    if ENDPOINT:
+        client_options["api_endpoint"] = ENDPOINT
+        transport = "rest"
+    model._client = glm.GenerativeServiceClient(
+        transport=transport,
+        client_options=client_options,
+        client_info=gapic_v1.client_info.ClientInfo(user_agent="weather_app"),
+    )
+    return model
+
+
+def get_model(api_key, model_name=MODEL_NAME):
+    cache_key = (key_hash(api_key), model_name)
+    model = _models.get(cache_key)
+    if model is None:
+        with _lock:
+            model = _models.get(cache_key)
+            if model is None:
+                model = make_model(api_key, model_name)
+                model._upstream = guard(api_key)
+                _models.set(cache_key, model)
+    return model
+
+
+def request_options(timeout=REQUEST_TIMEOUT, deadline=RETRY_DEADLINE):
+    return {
+        "timeout": timeout,
+        "retry": api_retry.Retry(
+            predicate=api_retry.if_exception_type(*RETRYABLE_ERRORS),
+            initial=RETRY_INITIAL,
+            maximum=RETRY_MAXIMUM,
+            multiplier=RETRY_MULTIPLIER,
+            timeout=deadline,
+        ),
+    }
+
+
+def _timed_stream(response, gemini, started, budget):
+    first = True
+    try:
+        for chunk in response:
+            if first:
+                instrumentation.observe("gemini.first_chunk", time.perf_counter() - started)
+                first = False
+            yield chunk
+    except Exception as e:
+        gemini.failure(e)
+        raise
+    gemini.success()
+    instrumentation.observe("gemini", time.perf_counter() - started)
+    instrumentation.record_usage(response, budget)
+
+
+def generate(model, prompt, stream=False, budget=None, **kwargs):
+    # Timed, with token usage recorded (per budget label when given); a stream is
+    # timed until it is exhausted. Raises upstream.UpstreamUnavailable without
+    # calling Gemini when the key is over its rate limit or its circuit is open.
+    kwargs.setdefault("request_options", request_options())
+    gemini = model._upstream
+    gemini.acquire()
+    instrumentation.count("gemini_requests")
+    started = time.perf_counter()
+    try:
+        if stream:
+            return _timed_stream(model.generate_content(prompt, stream=True, **kwargs), gemini, started, budget)
+        with instrumentation.timed("gemini"):
+            response = model.generate_content(prompt, stream=False, **kwargs)
+    except Exception as e:
+        gemini.failure(e)
+        raise
+    gemini.success()
+    instrumentation.record_usage(response, budget)
+    return response
@@ -0,0 +1,192 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import instrumentation
+import upstream
+from cache import TTLCache
+
+# Layered lookup: offline gazetteer -> in-process LRU -> SQLite store -> Nominatim.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("WEATHER_CACHE_DIR", os.path.join(APP_DIR, ".cache"))
+GAZETTEER_PATH = os.environ.get("WEATHER_GAZETTEER", os.path.join(APP_DIR, "data", "gazetteer.csv"))
+GEOCODE_DB_PATH = os.path.join(CACHE_DIR, "geocode.sqlite")
+
+GEOCODE_TTL = 30 * 24 * 3600  # Cities don't move; refresh monthly
+NEGATIVE_TTL = 24 * 3600  # Retry unknown names daily
+PURGE_GRACE = GEOCODE_TTL  # expired rows stay this long as a fallback while Nominatim is down
+PURGE_INTERVAL = 24 * 3600
+NOMINATIM_MIN_DELAY = float(os.environ.get("WEATHER_NOMINATIM_DELAY", "1.0"))  # Nominatim usage policy: max 1 request per second
+NOMINATIM_MAX_WAIT = float(os.environ.get("WEATHER_NOMINATIM_MAX_WAIT", "5"))  # then give up rather than queue
+# Alternative Nominatim server, e.g. "http://127.0.0.1:8702" for fake_upstreams.py
+NOMINATIM_URL = os.environ.get("WEATHER_NOMINATIM_URL", "")
+
+# Rate limit shared by every session in the process; expired geocodes are kept
+# as a fallback for when Nominatim is unavailable
+nominatim = upstream.register(
+    "nominatim", rate=1 / NOMINATIM_MIN_DELAY if NOMINATIM_MIN_DELAY else 0, max_wait=NOMINATIM_MAX_WAIT,
+)
+_memory_cache = TTLCache(maxsize=2048, ttl=GEOCODE_TTL, stale=GEOCODE_TTL)
+_lock = threading.Lock()
+_geolocator = None
+_store = None
+_gazetteer = None
+
+
+def normalize_location(name):
+    # "  São Paulo ,Brazil" -> "sao paulo, brazil"
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"\s*,\s*", ", ", name.casefold())
+    return re.sub(r"\s+", " ", name).strip(" ,")
+
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    # Index each row under "name" and "name, country"; the first (most relevant) row wins.
+    index = {}
+    if not path or not os.path.exists(path):
+        return index
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            coords = (float(row["lat"]), float(row["lon"]))
+            for key in (row["name"], f"{row['name']}, {row.get('country', '')}"):
+                index.setdefault(normalize_location(key), coords)
+    return index
+
+
+def get_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                _gazetteer = load_gazetteer()
+    return _gazetteer
+
+
+class GeocodeStore:
+    # Disk-backed geocode results shared across processes and restarts.
+
+    def __init__(self, path=GEOCODE_DB_PATH, ttl=GEOCODE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, stale=False):
+        # Returns (found, (lat, lon)); a cached miss is (True, (None, None)).
+        # stale=True also returns expired rows not yet purged.
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, expires_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[2] < time.time() and not stale):
+            return False, (None, None)
+        return True, (row[0], row[1])
+
+    def set(self, key, coords):
+        ttl = self.ttl if coords[0] is not None else self.negative_ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                (key, coords[0], coords[1], time.time() + ttl),
+            )
+            self._conn.commit()
+
+    def purge_expired(self, grace=PURGE_GRACE):
+        # Drop rows (mostly negative results for one-off names) expired over `grace` seconds ago
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM geocode WHERE expires_at < ?", (time.time() - grace,)).rowcount
+            self._conn.commit()
+        return deleted
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                try:
+                    _store = GeocodeStore()
+                except sqlite3.Error:
+                    # Read-only filesystem etc. - keep working with the memory cache only
+                    _store = GeocodeStore(":memory:")
+                # Long-running processes also purge daily from prefetch.py
+                _store.purge_expired()
+    return _store
+
+
+def get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        with _lock:
+            if _geolocator is None:
+                from geopy.geocoders import Nominatim
+
+                if NOMINATIM_URL:
+                    scheme, _, domain = NOMINATIM_URL.rpartition("://")
+                    geolocator = Nominatim(user_agent="weather_app", timeout=5, domain=domain, scheme=scheme or "https")
+                else:
+                    geolocator = Nominatim(user_agent="weather_app", timeout=5)
+                _geolocator = geolocator.geocode
+    return _geolocator
+
+
+def geocode_remote(location):
+    # Rate limited and circuit-broken process-wide, see upstream.py
+    geocode = get_geolocator()
+    with instrumentation.timed("nominatim"):
+        loc = nominatim.call(geocode, location)
+    if loc:
+        return loc.latitude, loc.longitude
+    return None, None
+
+
+@instrumentation.timer("geocode")
+def get_coordinates(location):
+    key = normalize_location(location)
+    if not key:
+        return None, None
+
+    coords = get_gazetteer().get(key)
+    if coords:
+        return coords
+
+    coords = _memory_cache.get(key)
+    if coords is not None:
+        return coords
+
+    store = get_store()
+    found, coords = store.get(key)
+    if found:
+        _memory_cache.set(key, coords, ttl=GEOCODE_TTL if coords[0] is not None else NEGATIVE_TTL)
+        return coords
+
+    try:
+        coords = geocode_remote(location)
+    except Exception:
+        # Network/service errors (or Nominatim unavailable) are not cached so the
+        # next call can retry; meanwhile an expired result is better than none
+        coords = _memory_cache.get_stale(key)
+        if coords is None:
+            coords = store.get(key, stale=True)[1]
+        return coords
+
+    _memory_cache.set(key, coords, ttl=GEOCODE_TTL if coords[0] is not None else NEGATIVE_TTL)
+    store.set(key, coords)
+    return coords
+
+
+def cache_stats():
+    return _memory_cache.stats()
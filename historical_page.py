@@ -0,0 +1,169 @@
+from datetime import datetime
+
+import streamlit as st
+
+import ui
+
+# Historical Data page. The viewed location and year are kept in session state,
+# so the charts stay up across reruns; they redraw from the climate store.
+
+def get_historical_data(location, year, units="metric"):
+    # Monthly aggregates precomputed by the historical store (ingested on first request)
+    import climate_store
+    import providers
+
+    store = climate_store.ensure_year(location, year)
+    monthly = providers.convert_units(store.monthly(location, year), units)
+    return {
+        "months": list(monthly.index),
+        "avg_temps": monthly["temp_mean"].round(1).tolist(),
+        "avg_precip": monthly["precip"].round(1).tolist(),
+        "summary": store.summary(location, year)
+    }
+
+def sidebar(profile):
+    st.title("📊 Historical Weather")
+
+    # Location for historical data
+    location_hist = st.selectbox(
+        "Select location",
+        [""] + profile["favorite_locations"],
+        key="hist_location"
+    )
+
+    # Year selection
+    year = st.selectbox("Select year", list(range(datetime.now().year, datetime.now().year-10, -1)))
+
+    view_historical = st.button("View Historical Data", width="stretch")
+
+    return {"location": location_hist, "year": year, "submit": view_historical}
+
+def show_history(location_hist, year, units):
+    import pandas as pd
+    import charts
+    import climate_stats
+    import climate_store
+    import providers
+
+    st.subheader(f"Historical Weather Data for {location_hist} ({year})")
+
+    unit_labels = providers.UNIT_LABELS[units]
+    hist_data = get_historical_data(location_hist, year, units)
+
+    # Create yearly temperature trend chart
+    fig_hist_temp = charts.line_chart(
+        hist_data["months"],
+        hist_data["avg_temps"],
+        title=f"Average Monthly Temperatures in {year}",
+        xaxis_title="Month",
+        yaxis_title=f"Temperature ({unit_labels['temp']})",
+        name='Avg Temperature',
+        color=st.session_state.theme_color,
+        width=3,
+    )
+
+    ui.plotly_chart(fig_hist_temp)
+
+    # Create precipitation chart
+    fig_hist_precip = charts.bar_chart(
+        hist_data["months"],
+        hist_data["avg_precip"],
+        title=f"Total Monthly Precipitation in {year}",
+        xaxis_title="Month",
+        yaxis_title=f"Precipitation ({unit_labels['precip']})",
+        name='Precipitation',
+    )
+
+    ui.plotly_chart(fig_hist_precip)
+
+    # Create a year-over-year comparison
+    st.subheader("Year-over-Year Comparison")
+
+    years = [year-2, year-1, year]
+    store = climate_store.ensure_years(location_hist, years)
+    summaries = [store.summary(location_hist, y) for y in years]
+    yearly_avg_temp = [providers.convert_value(s["temp_mean"], "temp_mean", units) for s in summaries]
+    yearly_avg_precip = [providers.convert_value(s["precip_total"], "precip", units) for s in summaries]
+
+    # Create a 2-column layout
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_yoy_temp = charts.bar_chart(
+            years,
+            yearly_avg_temp,
+            title="Yearly Average Temperature",
+            xaxis_title="Year",
+            yaxis_title=f"Temperature ({unit_labels['temp']})",
+            color=charts.ORANGE,
+            height=350,
+        )
+
+        ui.plotly_chart(fig_yoy_temp)
+
+    with col2:
+        fig_yoy_precip = charts.bar_chart(
+            years,
+            yearly_avg_precip,
+            title="Yearly Total Precipitation",
+            xaxis_title="Year",
+            yaxis_title=f"Precipitation ({unit_labels['precip']})",
+            height=350,
+        )
+
+        ui.plotly_chart(fig_yoy_precip)
+
+    # Temperature anomaly against the previous five years, 30-day rolling mean
+    baseline_years = list(range(year - 5, year))
+    climate_store.ensure_years(location_hist, baseline_years)
+    anomaly = store.anomalies(location_hist, year, baseline_years)
+    anomaly_scale, _ = climate_stats.unit_factors(["temp_mean"], units)
+
+    fig_anomaly = charts.line_chart(
+        anomaly.index.strftime("%Y-%m-%d"),
+        anomaly.to_numpy() * anomaly_scale[0],
+        title=f"Temperature Anomaly vs. {baseline_years[0]}–{baseline_years[-1]} Average (30-day rolling)",
+        xaxis_title="Date",
+        yaxis_title=f"Anomaly ({unit_labels['temp']})",
+        name='Anomaly',
+        color=st.session_state.theme_color,
+        width=2,
+        height=350,
+        mode='lines',
+        fill='tozeroy',
+    )
+
+    ui.plotly_chart(fig_anomaly)
+
+    # Add weather extremes for the year
+    st.subheader(f"Weather Extremes in {year}")
+
+    extremes = hist_data["summary"]["extremes"]
+    value_formats = {
+        "temp_max": "{:.1f}" + unit_labels["temp"],
+        "temp_min": "{:.1f}" + unit_labels["temp"],
+        "precip": "{:.1f} " + unit_labels["precip"],
+        "wind_max": "{:.0f} " + unit_labels["wind"]
+    }
+    extremes_data = {
+        "Event": [e["event"] for e in extremes],
+        "Value": [value_formats[e["column"]].format(providers.convert_value(e["value"], e["column"], units)) for e in extremes],
+        "Date": [datetime.fromisoformat(e["date"]).strftime("%b %d, %Y") for e in extremes]
+    }
+
+    extremes_df = pd.DataFrame(extremes_data)
+    st.table(extremes_df)
+
+def main(profile, state):
+    ui.main_title("📊 Historical Weather Data")
+
+    if state["submit"] and state["location"]:
+        st.session_state.hist_request = (state["location"], state["year"])
+
+    request = st.session_state.get("hist_request")
+    if request is None:
+        if not state["location"]:
+            st.info("Please select a location from the sidebar.")
+        return
+
+    show_history(*request, profile["preferred_units"])
@@ -0,0 +1,244 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Process-wide timings for capacity planning: a latency histogram per stage
+# (geocode, gemini, map build, chart build, chart serialization, page reruns),
+# counters (Gemini requests and tokens), the hit ratios of the shared caches and
+# the health of the upstream circuit breakers.
+# Shown on the hidden Diagnostics page (?diagnostics=1) and, with
+# WEATHER_METRICS_PORT set, served as Prometheus text on /metrics.
+#
+# Histograms use fixed buckets like Prometheus, so memory is constant however
+# many calls are recorded; percentiles are interpolated within a bucket.
+
+METRICS_PORT = int(os.environ.get("WEATHER_METRICS_PORT", "0"))
+PREFIX = "weather"
+
+# 1ms to ~90s in sqrt(2) steps
+BUCKETS = tuple(round(0.001 * 2 ** (i / 2), 6) for i in range(34))
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Caches reported when their module has been imported: name -> (module, stats function)
+CACHES = {
+    "geocode": ("geocoding", "cache_stats"),
+    "forecast": ("forecast_cache", "stats"),
+    "air_quality": ("forecast_cache", "air_quality_stats"),
+    "nearby": ("nearby", "cache_stats"),
+    "figures": ("charts", "stats"),
+}
+
+# Circuit state as a gauge value
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_server = None
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets + (largest,), counts):
+            if n and cumulative + n >= rank:
+                return min(largest, lower + (bound - lower) * (rank - cumulative) / n)
+            cumulative += n
+            lower = bound
+        return largest
+
+    def summary(self):
+        summary = {"count": self.count, "mean": self.sum / self.count if self.count else None, "max": self.max}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = self.quantile(q)
+        return summary
+
+
+def histogram(stage):
+    hist = _histograms.get(stage)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(stage, Histogram())
+    return hist
+
+
+def observe(stage, seconds):
+    histogram(stage).observe(seconds)
+
+
+@contextmanager
+def timed(stage):
+    # Errors are timed too: a slow failure costs as much as a slow success
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def timer(stage):
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _counter_name(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+
+def record_usage(response, budget=None):
+    # Token counts from a Gemini response (available once a stream is exhausted),
+    # also per token budget (prompts.budget_label). Truncated answers are counted
+    # by forecast_cache.put, which sees whether the answer parsed.
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    count("gemini_prompt_tokens", prompt_tokens)
+    count("gemini_output_tokens", output_tokens)
+    if budget is None:
+        return
+    count("gemini_budget_requests", budget=budget)
+    count("gemini_budget_prompt_tokens", prompt_tokens, budget=budget)
+    count("gemini_budget_output_tokens", output_tokens, budget=budget)
+
+
+def budget_usage():
+    # {budget: {"requests", "prompt_tokens", "output_tokens", "truncated"}}
+    with _lock:
+        counters = dict(_counters)
+    usage = {}
+    for (name, labels), value in counters.items():
+        if name.startswith("gemini_budget_"):
+            row = usage.setdefault(dict(labels)["budget"], {"requests": 0, "prompt_tokens": 0, "output_tokens": 0, "truncated": 0})
+            row[name[len("gemini_budget_"):]] = value
+    return usage
+
+
+def cache_stats():
+    stats = {}
+    for name, (module_name, function) in CACHES.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            stats[name] = getattr(module, function)()
+    return stats
+
+
+def upstream_health():
+    # Reported once upstream.py has been imported (by geocoding or gemini_client)
+    module = sys.modules.get("upstream")
+    return module.health() if module is not None else {}
+
+
+def snapshot():
+    with _lock:
+        stages = dict(_histograms)
+        counters = dict(_counters)
+    return {
+        "stages": {stage: hist.summary() for stage, hist in sorted(stages.items())},
+        "counters": {_counter_name(name, labels): value for (name, labels), value in counters.items()},
+        "caches": cache_stats(),
+        "upstreams": upstream_health(),
+    }
+
+
+def prometheus_text():
+    lines = [f"# TYPE {PREFIX}_stage_seconds histogram"]
+    with _lock:
+        stages = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+    for stage, hist in stages:
+        with hist._lock:
+            counts, total, count_ = list(hist.counts), hist.sum, hist.count
+        cumulative = 0
+        for bound, n in zip(hist.buckets, counts):
+            cumulative += n
+            lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count_}')
+        lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {total}')
+        lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {count_}')
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        lines.append(f"{PREFIX}_{_counter_name(name + '_total', labels)} {value}")
+    caches = cache_stats()
+    for metric, key, kind in (("cache_hits", "hits", "counter"), ("cache_misses", "misses", "counter"),
+                              ("cache_entries", "size", "gauge")):
+        suffix = "_total" if kind == "counter" else ""
+        lines.append(f"# TYPE {PREFIX}_{metric}{suffix} {kind}")
+        for name, stats in caches.items():
+            lines.append(f'{PREFIX}_{metric}{suffix}{{cache="{name}"}} {stats[key]}')
+    lines.append(f"# TYPE {PREFIX}_upstream_circuit_state gauge")
+    for name, health in upstream_health().items():
+        lines.append(f'{PREFIX}_upstream_circuit_state{{upstream="{name}"}} {CIRCUIT_STATES[health["state"]]}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=METRICS_PORT, host="0.0.0.0"):
+    # Idempotent; disabled unless a port is configured
+    global _server
+    if _server is None and port:
+        with _lock:
+            if _server is None:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+                threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,111 @@
+import csv
+import os
+import threading
+
+import numpy as np
+
+from cache import TTLCache
+from geocoding import GAZETTEER_PATH
+from providers import CURRENT_COLUMNS, get_provider
+
+# Nearest gazetteer cities to a point, for the map's "nearby weather" overlay.
+# Cities are kept sorted by latitude; a query sweeps a latitude band around the
+# point (one degree of latitude is ~111 km everywhere), widening it until the
+# k-th nearest haversine distance fits inside the band. Everything outside the
+# band is provably farther, so the answer is exact without scanning the table.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+INITIAL_BAND_DEG = 2.0
+NEARBY_TTL = 10 * 60  # Same freshness as the "Current" forecast
+
+_snapshots = TTLCache(maxsize=1024, ttl=NEARBY_TTL)
+_lock = threading.Lock()
+_index = None
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NearbyIndex:
+
+    def __init__(self, names, lats, lons):
+        order = np.argsort(lats, kind="stable")
+        self.names = [names[i] for i in order]
+        self.lats = np.asarray(lats, dtype=np.float64)[order]
+        self.lons = np.asarray(lons, dtype=np.float64)[order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, lat, lon, k=5, min_km=1.0):
+        # [(name, lat, lon, distance_km)] for the k closest cities, skipping any
+        # closer than min_km (the queried city itself)
+        if not len(self):
+            return []
+        band = INITIAL_BAND_DEG
+        while True:
+            lo = np.searchsorted(self.lats, lat - band, side="left")
+            hi = np.searchsorted(self.lats, lat + band, side="right")
+            distances = haversine_km(lat, lon, self.lats[lo:hi], self.lons[lo:hi])
+            keep = np.flatnonzero(distances >= min_km)
+            covers_all = lo == 0 and hi == len(self)
+            if len(keep) >= k or covers_all:
+                picked = keep[np.argsort(distances[keep], kind="stable")[:k]]
+                if covers_all or distances[picked[-1]] <= band * KM_PER_DEGREE:
+                    return [
+                        (self.names[lo + i], float(self.lats[lo + i]), float(self.lons[lo + i]), float(distances[i]))
+                        for i in picked
+                    ]
+            band *= 2
+
+
+def load_index(path=GAZETTEER_PATH):
+    names, lats, lons = [], [], []
+    if path and os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                names.append(f"{row['name']}, {row['country']}" if row.get("country") else row["name"])
+                lats.append(float(row["lat"]))
+                lons.append(float(row["lon"]))
+    return NearbyIndex(names, lats, lons)
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = load_index()
+    return _index
+
+
+def current_weather(names, refresh=False):
+    # Current conditions per location, fetched in one provider batch for the cache
+    # misses (or for all of them when refresh is set)
+    rows = {name: None if refresh else _snapshots.get(name) for name in names}
+    missing = [name for name, row in rows.items() if row is None]
+    if missing:
+        fetched = get_provider().current(missing)
+        for name, row in fetched.iterrows():
+            rows[name] = row[CURRENT_COLUMNS].to_dict()
+            _snapshots.set(name, rows[name])
+    return rows
+
+
+def nearby_weather(lat, lon, k=5):
+    # Nearest cities with their current weather; a city the provider couldn't
+    # resolve comes back with weather None
+    places = get_index().nearest(lat, lon, k)
+    weather = current_weather([name for name, _, _, _ in places])
+    return [
+        {"name": name, "lat": p_lat, "lon": p_lon, "distance_km": distance, "weather": weather.get(name)}
+        for name, p_lat, p_lon, distance in places
+    ]
+
+
+def cache_stats():
+    return _snapshots.stats()
@@ -0,0 +1,212 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import forecast_cache
+import profiles
+from geocoding import GEOCODE_TTL, PURGE_INTERVAL, get_coordinates, get_store
+
+# Background warmer for favourite locations. Every tick it takes the union of
+# all profiles' favourites and refreshes geocodes, current conditions, air quality
+# and (with GEMINI_API_KEY set) forecasts shortly before the cached entries
+# expire, so picking a favourite in the sidebar is served from a warm cache.
+# Forecasts are fetched several favourites per Gemini request (see
+# forecast_service.get_forecasts), so the per-tick cap counts batched requests.
+# It also purges long-expired rows from the geocode store about once a day.
+#
+# Each job is rescheduled at REFRESH_AT of its cache TTL with random jitter, so
+# entries never expire and refreshes don't synchronize. Work runs on a small
+# dedicated pool (the concurrency cap), Gemini calls are capped per tick to leave
+# quota for interactive requests, failures back off exponentially, and a
+# rate-limit response pauses that upstream altogether for a while.
+#
+# The scheduler waits STARTUP_DELAY before its first tick and imports the data
+# and Gemini modules only then, so starting it doesn't slow the app's cold start.
+
+PREFETCH_ENABLED = os.environ.get("WEATHER_PREFETCH", "1") != "0"
+TICK = float(os.environ.get("WEATHER_PREFETCH_TICK", "30"))
+WORKERS = int(os.environ.get("WEATHER_PREFETCH_WORKERS", "4"))
+MAX_LOCATIONS = int(os.environ.get("WEATHER_PREFETCH_LOCATIONS", "50"))
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_PER_TICK = int(os.environ.get("WEATHER_PREFETCH_GEMINI_PER_TICK", "5"))
+STARTUP_DELAY = float(os.environ.get("WEATHER_PREFETCH_DELAY", "10"))
+
+REFRESH_AT = 0.8  # refresh once 80% of an entry's TTL has passed
+JITTER = 0.1
+BACKOFF_MIN = 60
+BACKOFF_MAX = 30 * 60
+RATE_LIMIT_PAUSE = 5 * 60
+
+# Forecasts are warmed for the sidebar defaults ("Show detailed information" ticked)
+FORECAST_TIME_FRAMES = ["Current weather"]
+FORECAST_DETAIL = "detailed"
+
+_lock = threading.Lock()
+_prefetcher = None
+
+
+def is_rate_limited(error):
+    from geopy.exc import GeocoderRateLimited
+    from google.api_core.exceptions import ResourceExhausted
+    from requests import HTTPError
+    from upstream import UpstreamUnavailable
+
+    # UpstreamUnavailable: over the process-wide rate limit, or the circuit is open
+    if isinstance(error, (ResourceExhausted, GeocoderRateLimited, UpstreamUnavailable)):
+        return True
+    return isinstance(error, HTTPError) and error.response is not None and error.response.status_code == 429
+
+
+def favorite_targets(limit=MAX_LOCATIONS):
+    # [(location, units)] across all profiles, most popular first; the default
+    # favourites are always included since a fresh profile is never written
+    targets = [(location, units or "metric") for location, units, _ in profiles.hot_favorites(limit)]
+    for location in profiles.DEFAULT_PROFILE["favorite_locations"]:
+        if (location, "metric") not in targets:
+            targets.append((location, "metric"))
+    return targets[:limit]
+
+
+def refresh_air_quality(locations):
+    from providers import get_provider
+
+    air = get_provider().air_quality(locations)
+    for location, row in air.iterrows():
+        forecast_cache.put_air_quality(location, row.to_dict())
+
+
+def refresh_forecasts(model, locations, units, time_frame):
+    import forecast_service
+
+    forecast_service.get_forecasts(model, locations, time_frame, units, FORECAST_DETAIL, refresh=True)
+
+
+class Prefetcher:
+
+    def __init__(self, tick=TICK, workers=WORKERS, api_key=GEMINI_API_KEY, startup_delay=STARTUP_DELAY):
+        self.tick = tick
+        self.startup_delay = startup_delay
+        self.api_key = api_key
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._due = {}
+        self._failures = {}
+        self._running = set()
+        self._paused_until = {}
+        self._thread = None
+        self.refreshed = 0
+        self.errors = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        self._stop.wait(self.startup_delay)
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # A bad tick (e.g. profile store unavailable) must not kill the scheduler
+                self.errors += 1
+            self._stop.wait(self.tick)
+
+    def jobs(self):
+        # (key, upstream, ttl, fn) for everything that should be kept warm
+        import nearby
+
+        targets = favorite_targets()
+        locations = list(dict.fromkeys(location for location, _ in targets))
+        jobs = [(("geocode", location), "nominatim", GEOCODE_TTL, partial(get_coordinates, location))
+                for location in locations]
+        jobs.append((("current",), "provider", nearby.NEARBY_TTL,
+                     partial(nearby.current_weather, locations, refresh=True)))
+        jobs.append((("air_quality",), "provider", forecast_cache.AIR_QUALITY_TTL,
+                     partial(refresh_air_quality, locations)))
+        jobs.append((("purge_geocodes",), "local", PURGE_INTERVAL, lambda: get_store().purge_expired()))
+        if self.api_key:
+            import forecast_service
+            import gemini_client
+            import prompts
+
+            # Favourites with the same units are warmed several to a Gemini request
+            model = gemini_client.get_model(self.api_key)
+            for units in dict.fromkeys(units for _, units in targets):
+                same_units = [location for location, target_units in targets if target_units == units]
+                for time_frame in FORECAST_TIME_FRAMES:
+                    size = prompts.batch_size(time_frame, FORECAST_DETAIL, forecast_service.BATCH_SIZE)
+                    for start in range(0, len(same_units), size):
+                        chunk = tuple(same_units[start:start + size])
+                        jobs.append((("forecast", chunk, units, time_frame), "gemini", forecast_cache.ttl_for(time_frame),
+                                     partial(refresh_forecasts, model, chunk, units, time_frame)))
+        return jobs
+
+    def run_once(self):
+        now = time.monotonic()
+        gemini_started = 0
+        for key, upstream, ttl, fn in self.jobs():
+            with self._lock:
+                if key not in self._due:
+                    # Spread the first refresh of new jobs over one tick
+                    self._due[key] = now + random.uniform(0, self.tick)
+                if key in self._running or self._due[key] > now or self._paused_until.get(upstream, 0) > now:
+                    continue
+                if upstream == "gemini":
+                    if gemini_started >= GEMINI_PER_TICK:
+                        continue
+                    gemini_started += 1
+                self._running.add(key)
+            future = self._executor.submit(fn)
+            future.add_done_callback(partial(self._done, key, upstream, ttl))
+
+    def _done(self, key, upstream, ttl, future):
+        now = time.monotonic()
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._running.discard(key)
+            if future.cancelled():
+                return
+            if error is None:
+                self._failures.pop(key, None)
+                self._due[key] = now + ttl * REFRESH_AT * random.uniform(1 - JITTER, 1 + JITTER)
+                self.refreshed += 1
+                return
+            self.errors += 1
+            failures = self._failures[key] = self._failures.get(key, 0) + 1
+            self._due[key] = now + min(BACKOFF_MAX, BACKOFF_MIN * 2 ** (failures - 1)) * random.uniform(1, 1 + JITTER)
+            if is_rate_limited(error):
+                self._paused_until[upstream] = now + RATE_LIMIT_PAUSE
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "scheduled": len(self._due),
+                "running": len(self._running),
+                "refreshed": self.refreshed,
+                "errors": self.errors,
+                "paused": sorted(upstream for upstream, until in self._paused_until.items() if until > now),
+            }
+
+
+def start():
+    # Idempotent: one scheduler per process, however many sessions call this
+    global _prefetcher
+    if _prefetcher is None and PREFETCH_ENABLED:
+        with _lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+                _prefetcher.start()
+    return _prefetcher
+
+
+def stats():
+    return _prefetcher.stats() if _prefetcher is not None else None
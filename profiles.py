@@ -0,0 +1,210 @@
+import atexit
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from cache import TTLCache
+from geocoding import CACHE_DIR, normalize_location
+
+# User profiles (favourites, units, theme, notifications) shared by every session
+# and kept across restarts. Reads go through a small in-process cache; writes
+# update the cache at once and are flushed to SQLite in batches by a background
+# thread, so widget changes on every rerun don't each cost a disk commit.
+# Favourites also live in their own table, which is what hot_favorites() ranks.
+
+PROFILE_DB_PATH = os.environ.get("WEATHER_PROFILE_DB", os.path.join(CACHE_DIR, "profiles.sqlite"))
+FLUSH_INTERVAL = 2.0  # seconds between background flushes
+FLUSH_BATCH = 64  # flush early once this many profiles are dirty
+
+DEFAULT_PROFILE = {
+    "name": "User",
+    "favorite_locations": ["Tokyo", "New York", "London"],
+    "preferred_units": "metric",
+    "theme": "dark",
+    "theme_color": "#00ffe0",
+    "notifications": True
+}
+
+_lock = threading.Lock()
+_store = None
+
+
+class ProfileStore:
+
+    def __init__(self, path=PROFILE_DB_PATH, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._cache = TTLCache(maxsize=1024, ttl=600)
+        self._dirty = {}
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "profile_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS favorites ("
+            "profile_id TEXT NOT NULL, location_key TEXT NOT NULL, location TEXT NOT NULL, "
+            "PRIMARY KEY (profile_id, location_key))"
+        )
+        self._conn.commit()
+        self._flusher = threading.Thread(target=self._run, name="profile-flush", daemon=True)
+        self._flusher.start()
+
+    def load(self, profile_id):
+        # Returns a private copy; callers mutate it and hand it back to save()
+        with self._lock:
+            profile = (
+                self._dirty.get(profile_id) or self._flushing.get(profile_id) or self._cache.get(profile_id)
+            )
+        if profile is None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT data FROM profiles WHERE profile_id = ?", (profile_id,)
+                ).fetchone()
+            profile = dict(DEFAULT_PROFILE, **json.loads(row[0])) if row else copy.deepcopy(DEFAULT_PROFILE)
+            self._cache.set(profile_id, profile)
+        return copy.deepcopy(profile)
+
+    def save(self, profile_id, profile):
+        with self._lock:
+            current = (
+                self._dirty.get(profile_id) or self._flushing.get(profile_id) or self._cache.get(profile_id)
+            )
+            if profile == current:
+                return
+            profile = copy.deepcopy(profile)
+            self._cache.set(profile_id, profile)
+            self._dirty[profile_id] = profile
+            pending = len(self._dirty)
+        if pending >= FLUSH_BATCH:
+            self._wake.set()
+
+    def reset(self, profile_id):
+        self.save(profile_id, copy.deepcopy(DEFAULT_PROFILE))
+        return self.load(profile_id)
+
+    def flush(self):
+        # Write every dirty profile in a single transaction
+        with self._db_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                self._flushing = dirty
+            if not dirty:
+                return 0
+            now = time.time()
+            try:
+                self._write(dirty, now)
+            except sqlite3.Error:
+                # Requeue the batch unless a newer save replaced it meanwhile
+                with self._lock:
+                    self._dirty = dict(dirty, **self._dirty)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+        return len(dirty)
+
+    def _write(self, dirty, now):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO profiles (profile_id, data, updated_at) VALUES (?, ?, ?)",
+                [(profile_id, json.dumps(profile), now) for profile_id, profile in dirty.items()],
+            )
+            self._conn.executemany(
+                "DELETE FROM favorites WHERE profile_id = ?", [(profile_id,) for profile_id in dirty]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO favorites (profile_id, location_key, location) VALUES (?, ?, ?)",
+                [
+                    (profile_id, normalize_location(location), location)
+                    for profile_id, profile in dirty.items()
+                    for location in profile["favorite_locations"]
+                    if normalize_location(location)
+                ],
+            )
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Batch was requeued; keep serving from the cache and retry next time
+                pass
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def hot_favorites(self, limit=50):
+        # [(location, units, profile count)] for the most-favourited locations across
+        # all users, split by the favouriting profiles' unit system, which is what a
+        # forecast is keyed on
+        self.flush()
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT MIN(f.location), json_extract(p.data, '$.preferred_units') AS units, COUNT(*) AS n "
+                "FROM favorites f JOIN profiles p ON p.profile_id = f.profile_id "
+                "GROUP BY f.location_key, units ORDER BY n DESC, MIN(f.location) LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def preload(self, limit=1024):
+        # Warm the read cache with the most recently updated profiles
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT profile_id, data FROM profiles ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        for profile_id, data in rows:
+            self._cache.set(profile_id, dict(DEFAULT_PROFILE, **json.loads(data)))
+        return len(rows)
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                try:
+                    _store = ProfileStore()
+                except sqlite3.Error:
+                    # Read-only filesystem etc. - profiles last for the process only
+                    _store = ProfileStore(":memory:")
+                atexit.register(_store.close)
+                # Recently active profiles are served from memory from the first rerun
+                _store.preload()
+    return _store
+
+
+def new_profile_id():
+    # Private to one browser unless the user shares it (the ?profile= link or the Settings field)
+    return uuid.uuid4().hex
+
+
+def load(profile_id):
+    return get_store().load(profile_id)
+
+
+def save(profile_id, profile):
+    get_store().save(profile_id, profile)
+
+
+def reset(profile_id):
+    return get_store().reset(profile_id)
+
+
+def hot_favorites(limit=50):
+    return get_store().hot_favorites(limit)
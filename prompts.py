@@ -0,0 +1,141 @@
+import forecast
+
+# Forecast prompt shared by the app and the background prefetcher, so both
+# produce the same request (and the same forecast cache entry) for a location.
+
+TIME_FRAMES = ["Current weather", "Today's forecast", "24-hour forecast", "3-day forecast", "Weekly forecast"]
+
+# Days/hours of numeric data to request for each time frame
+POINTS = {
+    "Current weather": (1, 8),
+    "Today's forecast": (1, 8),
+    "24-hour forecast": (2, 8),
+    "3-day forecast": (3, 0),
+    "Weekly forecast": (7, 0),
+}
+
+# Profile unit system -> (temperature unit, wind unit) named in the prompt
+UNITS_TEXT = {
+    "metric": ("Celsius", "km/h"),
+    "imperial": ("Fahrenheit", "mph"),
+}
+
+
+# Output token budgets. Generation time grows with output length, so each
+# request gets max_output_tokens sized for what it asks for: the summary for the
+# detail level plus the daily/hourly entries of the time frame, with headroom.
+SUMMARY_WORDS = {"detailed": 150, "brief": 50}
+SUMMARY_TOKENS = {"detailed": 300, "brief": 100}
+FIELD_TOKENS = 150  # scalar fields, alerts and tips
+DAILY_TOKENS = 45
+HOURLY_TOKENS = 25
+HEADROOM = 1.25
+MAX_OUTPUT_TOKENS = 8192  # model limit, caps how many locations fit in one batched request
+
+SUMMARY_CONTENT = {
+    "detailed": "temperature (actual and feels like), humidity, precipitation chance, wind speed and "
+                "direction, air quality, sunrise and sunset, and any weather alerts",
+    "brief": "conditions, temperature range and precipitation chance",
+}
+
+
+def date_info(time_frame, now):
+    today_str = now.strftime("%A, %d %B %Y")
+    if time_frame == "Current weather":
+        return f"as of now ({today_str})"
+    elif time_frame == "Today's forecast":
+        return f"for today ({today_str})"
+    elif time_frame == "24-hour forecast":
+        return f"for the next 24 hours (starting {today_str})"
+    elif time_frame == "3-day forecast":
+        return f"for the 3 days starting {today_str}"
+    elif time_frame == "Weekly forecast":
+        return f"for the 7 days starting {today_str}"
+    raise ValueError(f"unknown time frame: {time_frame}")
+
+
+def output_budget(time_frame, detail_level):
+    daily_points, hourly_points = POINTS[time_frame]
+    tokens = SUMMARY_TOKENS[detail_level] + FIELD_TOKENS + DAILY_TOKENS * daily_points + HOURLY_TOKENS * hourly_points
+    return int(tokens * HEADROOM)
+
+
+def budget_label(time_frame, detail_level, locations=1):
+    # Groups token counts in instrumentation; batched requests get their own label
+    label = f"{time_frame}/{detail_level}"
+    return label if locations == 1 else f"{label}/x{locations}"
+
+
+def label_budget(label):
+    # max_output_tokens of the requests counted under a budget_label
+    time_frame, detail_level, *batch = label.split("/")
+    return min(MAX_OUTPUT_TOKENS, output_budget(time_frame, detail_level) * int(batch[0][1:] if batch else 1))
+
+
+def batch_size(time_frame, detail_level, limit):
+    # Locations per batched request, so their combined budget fits the model limit
+    return max(1, min(limit, MAX_OUTPUT_TOKENS // output_budget(time_frame, detail_level)))
+
+
+def generation_config(time_frame, detail_level):
+    return dict(
+        forecast.GENERATION_CONFIG,
+        max_output_tokens=output_budget(time_frame, detail_level),
+        temperature=0.3,
+        candidate_count=1,
+    )
+
+
+def forecast_prompt(location, time_frame, units, detail_level, now):
+    # units is the profile's unit system ("metric" / "imperial")
+    units_text, wind_unit = UNITS_TEXT[units]
+    daily_points, hourly_points = POINTS[time_frame]
+    return f"""
+Act as a professional weather forecaster.
+Give a {detail_level} forecast for **{location}**, {date_info(time_frame, now)}.
+Use {units_text} for temperature and {wind_unit} for wind speed.
+
+Respond with JSON matching the response schema:
+- "summary": markdown bullet points, at most {SUMMARY_WORDS[detail_level]} words, covering
+  {SUMMARY_CONTENT[detail_level]}. If unsure about data, say it's an estimate.
+- "condition": the dominant weather condition.
+- "aqi": estimated US AQI; "precip_chance" and "humidity" in percent.
+- "daily": {daily_points} entries (short day names as "date").
+- "hourly": {hourly_points} entries at 3-hour steps ("time" as HH:MM).
+- "alerts": weather alerts or warnings, if any.
+- "tips": 1–2 short weather tips.
+"""
+
+
+def batch_prompt(locations, time_frame, units, detail_level, now):
+    # One request for several locations; same content per location as forecast_prompt
+    units_text, wind_unit = UNITS_TEXT[units]
+    daily_points, hourly_points = POINTS[time_frame]
+    names = "\n".join(f"- **{location}**" for location in locations)
+    return f"""
+Act as a professional weather forecaster.
+Give a {detail_level} forecast {date_info(time_frame, now)} for each of these {len(locations)} locations:
+{names}
+Use {units_text} for temperature and {wind_unit} for wind speed.
+
+Respond with JSON matching the response schema: "forecasts" has one entry per
+location, in the order listed, each with:
+- "location": the location name exactly as listed.
+- "summary": markdown bullet points, at most {SUMMARY_WORDS[detail_level]} words, covering
+  {SUMMARY_CONTENT[detail_level]}. If unsure about data, say it's an estimate.
+- "condition": the dominant weather condition.
+- "aqi": estimated US AQI; "precip_chance" and "humidity" in percent.
+- "daily": {daily_points} entries (short day names as "date").
+- "hourly": {hourly_points} entries at 3-hour steps ("time" as HH:MM).
+- "alerts": weather alerts or warnings, if any.
+- "tips": 1–2 short weather tips.
+"""
+
+
+def batch_generation_config(time_frame, detail_level, locations):
+    return dict(
+        forecast.BATCH_GENERATION_CONFIG,
+        max_output_tokens=min(MAX_OUTPUT_TOKENS, output_budget(time_frame, detail_level) * locations),
+        temperature=0.3,
+        candidate_count=1,
+    )
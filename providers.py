@@ -0,0 +1,318 @@
+import os
+import re
+import threading
+import zlib
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import climate_stats
+from geocoding import APP_DIR, get_coordinates, normalize_location
+
+# Numeric weather data behind the Weather, Compare and Historical Data views.
+# All frames are metric: °C, mm, km/h, percent. Locations that can't be resolved
+# are left out of the result rather than raising.
+
+FORECAST_COLUMNS = ["location", "date", "temp_max", "temp_min", "precip_chance", "wind_speed", "humidity"]
+CURRENT_COLUMNS = ["temp", "humidity", "wind_speed", "precip_chance"]
+AIR_QUALITY_COLUMNS = ["aqi", "PM2.5", "PM10", "O3", "NO2", "SO2", "CO"]
+HISTORY_COLUMNS = ["temp_mean", "temp_max", "temp_min", "precip", "wind_max", "humidity"]
+
+LOCAL_DATA_DIR = os.environ.get("WEATHER_LOCAL_DATA", os.path.join(APP_DIR, "data", "local"))
+
+
+def location_slug(location):
+    return re.sub(r"[^a-z0-9]+", "_", normalize_location(location)).strip("_")
+
+
+class WeatherProvider:
+    # Batched interface: every call takes a list of locations so backends can
+    # answer many locations with one request.
+
+    def forecast(self, locations, horizon=7):
+        # Long frame with FORECAST_COLUMNS, one row per (location, day)
+        raise NotImplementedError
+
+    def current(self, locations):
+        # Frame indexed by location with CURRENT_COLUMNS
+        raise NotImplementedError
+
+    def air_quality(self, locations):
+        # Frame indexed by location with AIR_QUALITY_COLUMNS
+        raise NotImplementedError
+
+    def history(self, location, year):
+        # Daily frame indexed by date with HISTORY_COLUMNS
+        raise NotImplementedError
+
+
+class LocalWeatherProvider(WeatherProvider):
+    # Deterministic offline backend. Daily observations are read from
+    # <data_dir>/<slug>.csv when present, otherwise synthesised from a seeded
+    # seasonal model of the location's latitude, so the same question always
+    # gets the same answer - useful for tests and offline benchmarks.
+
+    def __init__(self, data_dir=LOCAL_DATA_DIR):
+        self.data_dir = data_dir
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _seed(self, location, *parts):
+        return zlib.crc32("|".join([location_slug(location), *map(str, parts)]).encode("utf-8"))
+
+    def _file_frame(self, location):
+        slug = location_slug(location)
+        with self._lock:
+            if slug not in self._files:
+                path = os.path.join(self.data_dir, f"{slug}.csv")
+                frame = None
+                if os.path.exists(path):
+                    frame = pd.read_csv(path, parse_dates=["date"], index_col="date")
+                self._files[slug] = frame
+            return self._files[slug]
+
+    def _resolve(self, locations):
+        # Locations with a data file, or coordinates to synthesise their weather from
+        return [
+            location for location in locations
+            if self._file_frame(location) is not None or get_coordinates(location)[0] is not None
+        ]
+
+    def _synthetic_year(self, location, year):
+        lat, _ = get_coordinates(location)
+        rng = np.random.default_rng(self._seed(location, year))
+        days = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D")
+        doy = days.dayofyear.to_numpy()
+
+        # Warmest around late July in the north, late January in the south
+        peak = 200 if lat >= 0 else 17
+        mean = 30 - 0.4 * abs(lat)
+        amplitude = 0.3 * abs(lat)
+        noise = np.convolve(rng.normal(0, 2.5, len(days) + 4), np.ones(5) / 5, mode="valid")
+        temp_mean = mean + amplitude * np.cos(2 * np.pi * (doy - peak) / 365.25) + noise
+        spread = rng.uniform(3, 7, len(days))
+        wet = rng.random(len(days)) < 0.3
+        return pd.DataFrame({
+            "temp_mean": temp_mean.round(1),
+            "temp_max": (temp_mean + spread).round(1),
+            "temp_min": (temp_mean - spread).round(1),
+            "precip": np.where(wet, rng.gamma(1.5, 4.0, len(days)), 0.0).round(1),
+            "wind_max": rng.gamma(4.0, 5.0, len(days)).round(1),
+            "humidity": (45 + 45 * rng.beta(2, 2, len(days))).round(0),
+        }, index=pd.DatetimeIndex(days, name="date"))
+
+    def _daily(self, location, start, end):
+        frame = self._file_frame(location)
+        if frame is not None:
+            return frame.loc[str(start):str(end), HISTORY_COLUMNS]
+        years = [self._synthetic_year(location, year) for year in range(start.year, end.year + 1)]
+        return pd.concat(years).loc[str(start):str(end)]
+
+    def history(self, location, year):
+        if not self._resolve([location]):
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return self._daily(location, date(year, 1, 1), min(date(year, 12, 31), date.today()))
+
+    def forecast(self, locations, horizon=7):
+        start = date.today()
+        frames = []
+        for location in self._resolve(locations):
+            daily = self._daily(location, start, start + timedelta(days=horizon - 1))
+            frames.append(pd.DataFrame({
+                "location": location,
+                "date": daily.index,
+                "temp_max": daily["temp_max"].to_numpy(),
+                "temp_min": daily["temp_min"].to_numpy(),
+                "precip_chance": np.clip(daily["precip"].to_numpy() * 12 + 5, 0, 100).round(0),
+                "wind_speed": daily["wind_max"].to_numpy(),
+                "humidity": daily["humidity"].to_numpy(),
+            }))
+        if not frames:
+            return pd.DataFrame(columns=FORECAST_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def current(self, locations):
+        today = self.forecast(locations, horizon=1)
+        today["temp"] = ((today["temp_max"] + today["temp_min"]) / 2).round(1)
+        return today.set_index("location")[CURRENT_COLUMNS]
+
+    def air_quality(self, locations):
+        today = date.today().isoformat()
+        rows = {}
+        for location in self._resolve(locations):
+            rng = np.random.default_rng(self._seed(location, "aqi", today))
+            rows[location] = {
+                "aqi": int(rng.integers(30, 150)),
+                "PM2.5": int(rng.integers(5, 50)),
+                "PM10": int(rng.integers(15, 70)),
+                "O3": int(rng.integers(20, 120)),
+                "NO2": int(rng.integers(10, 80)),
+                "SO2": int(rng.integers(5, 40)),
+                "CO": int(rng.integers(1, 15)),
+            }
+        return pd.DataFrame.from_dict(rows, orient="index", columns=AIR_QUALITY_COLUMNS)
+
+
+class HttpWeatherProvider(WeatherProvider):
+    # Open-Meteo backend (no API key). Forecast and air-quality calls take
+    # comma-separated coordinates, so a whole batch is a single request.
+
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+    ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+    def __init__(self, timeout=10):
+        import requests
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "weather_app"
+
+    def _resolve(self, locations):
+        resolved = []
+        for location in locations:
+            lat, lon = get_coordinates(location)
+            if lat is not None:
+                resolved.append((location, lat, lon))
+        return resolved
+
+    def _get(self, url, resolved, **params):
+        params["latitude"] = ",".join(f"{lat:.4f}" for _, lat, _ in resolved)
+        params["longitude"] = ",".join(f"{lon:.4f}" for _, _, lon in resolved)
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        # A single coordinate returns an object, several return a list
+        return payload if isinstance(payload, list) else [payload]
+
+    def forecast(self, locations, horizon=7):
+        resolved = self._resolve(locations)
+        if not resolved:
+            return pd.DataFrame(columns=FORECAST_COLUMNS)
+        payloads = self._get(
+            self.FORECAST_URL, resolved, forecast_days=horizon, timezone="auto",
+            daily="temperature_2m_max,temperature_2m_min,precipitation_probability_max,"
+                  "wind_speed_10m_max,relative_humidity_2m_mean",
+        )
+        frames = []
+        for (location, _, _), payload in zip(resolved, payloads):
+            daily = payload["daily"]
+            frames.append(pd.DataFrame({
+                "location": location,
+                "date": pd.to_datetime(daily["time"]),
+                "temp_max": daily["temperature_2m_max"],
+                "temp_min": daily["temperature_2m_min"],
+                "precip_chance": daily["precipitation_probability_max"],
+                "wind_speed": daily["wind_speed_10m_max"],
+                "humidity": daily["relative_humidity_2m_mean"],
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def current(self, locations):
+        resolved = self._resolve(locations)
+        if not resolved:
+            return pd.DataFrame(columns=CURRENT_COLUMNS)
+        payloads = self._get(
+            self.FORECAST_URL, resolved, forecast_days=1, timezone="auto",
+            current="temperature_2m,relative_humidity_2m,wind_speed_10m",
+            daily="precipitation_probability_max",
+        )
+        rows = {}
+        for (location, _, _), payload in zip(resolved, payloads):
+            current = payload["current"]
+            rows[location] = {
+                "temp": current["temperature_2m"],
+                "humidity": current["relative_humidity_2m"],
+                "wind_speed": current["wind_speed_10m"],
+                "precip_chance": payload["daily"]["precipitation_probability_max"][0],
+            }
+        return pd.DataFrame.from_dict(rows, orient="index", columns=CURRENT_COLUMNS)
+
+    def air_quality(self, locations):
+        resolved = self._resolve(locations)
+        if not resolved:
+            return pd.DataFrame(columns=AIR_QUALITY_COLUMNS)
+        payloads = self._get(
+            self.AIR_QUALITY_URL, resolved,
+            current="us_aqi,pm2_5,pm10,ozone,nitrogen_dioxide,sulphur_dioxide,carbon_monoxide",
+        )
+        rows = {}
+        for (location, _, _), payload in zip(resolved, payloads):
+            current = payload["current"]
+            rows[location] = {
+                "aqi": current["us_aqi"],
+                "PM2.5": current["pm2_5"],
+                "PM10": current["pm10"],
+                "O3": current["ozone"],
+                "NO2": current["nitrogen_dioxide"],
+                "SO2": current["sulphur_dioxide"],
+                # µg/m³ -> mg/m³ to match the scale of the other backends
+                "CO": round(current["carbon_monoxide"] / 1000, 2),
+            }
+        return pd.DataFrame.from_dict(rows, orient="index", columns=AIR_QUALITY_COLUMNS)
+
+    def history(self, location, year):
+        resolved = self._resolve([location])
+        if not resolved:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        end = min(date(year, 12, 31), date.today() - timedelta(days=1))
+        (payload,) = self._get(
+            self.ARCHIVE_URL, resolved, start_date=f"{year}-01-01", end_date=end.isoformat(),
+            timezone="auto",
+            daily="temperature_2m_mean,temperature_2m_max,temperature_2m_min,precipitation_sum,"
+                  "wind_speed_10m_max,relative_humidity_2m_mean",
+        )
+        daily = payload["daily"]
+        return pd.DataFrame({
+            "temp_mean": daily["temperature_2m_mean"],
+            "temp_max": daily["temperature_2m_max"],
+            "temp_min": daily["temperature_2m_min"],
+            "precip": daily["precipitation_sum"],
+            "wind_max": daily["wind_speed_10m_max"],
+            "humidity": daily["relative_humidity_2m_mean"],
+        }, index=pd.DatetimeIndex(pd.to_datetime(daily["time"]), name="date"))
+
+
+PROVIDERS = {
+    "local": LocalWeatherProvider,
+    "http": HttpWeatherProvider,
+}
+
+_provider = None
+_lock = threading.Lock()
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _lock:
+            if _provider is None:
+                _provider = PROVIDERS[os.environ.get("WEATHER_PROVIDER", "local")]()
+    return _provider
+
+
+UNIT_LABELS = {
+    "metric": {"temp": "°C", "precip": "mm", "wind": "km/h"},
+    "imperial": {"temp": "°F", "precip": "in", "wind": "mph"},
+}
+
+
+def convert_units(frame, units):
+    # Returns a copy of a metric frame in the requested unit system, in one vectorized pass
+    if units != "imperial":
+        return frame
+    scale, offset = climate_stats.unit_factors(frame.columns, units)
+    convert = scale != 1
+    frame = frame.copy()
+    columns = frame.columns[convert]
+    frame[columns] = frame[columns].to_numpy(dtype=np.float64) * scale[convert] + offset[convert]
+    return frame
+
+
+def convert_value(value, column, units):
+    # Scalar version of convert_units for a value from the given metric column
+    if value is None:
+        return None
+    scale, offset = climate_stats.unit_factors([column], units)
+    return float(value * scale[0] + offset[0])
@@ -0,0 +1,55 @@
+import streamlit as st
+
+import profiles
+
+# Settings page; everything lives in the sidebar.
+
+THEME_OPTIONS = {
+    "#00ffe0": "Cyber Teal",
+    "#ff5e78": "Neon Pink",
+    "#a566ff": "Purple Haze",
+    "#00ff9d": "Matrix Green",
+    "#ffcc00": "Golden Sun"
+}
+
+def switch_profile():
+    # Clearing the field starts a new private profile
+    profile_id = st.session_state.profile_id.strip() or profiles.new_profile_id()
+    st.session_state.profile_id = profile_id
+    st.session_state.current_profile = profile_id
+    st.query_params["profile"] = profile_id
+
+def sidebar(profile):
+    st.title("⚙️ Settings")
+
+    # User profile settings
+    st.text_input("Profile ID", key="profile_id", on_change=switch_profile,
+                  help="Use the same profile ID on any device to share favorites and settings")
+    profile["name"] = st.text_input("Your Name", value=profile["name"])
+
+    # FEATURE 7: Theme Customization
+    st.subheader("Theme Settings")
+    selected_theme = st.selectbox("Theme Color", list(THEME_OPTIONS.values()),
+                                  index=list(THEME_OPTIONS).index(profile["theme_color"]) if profile["theme_color"] in THEME_OPTIONS else 0)
+    for color, name in THEME_OPTIONS.items():
+        if name == selected_theme:
+            st.session_state.theme_color = color
+            profile["theme_color"] = color
+
+    st.markdown("<div class='theme-swatch'></div>", unsafe_allow_html=True)
+
+    # Notification settings
+    profile["notifications"] = st.checkbox("Enable notifications", value=profile["notifications"])
+
+    # Clear data option
+    if st.button("Reset All Settings"):
+        # Reset the stored profile to defaults and start a fresh session
+        profiles.reset(st.session_state.current_profile)
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.rerun()
+
+    return {}
+
+def main(profile, state):
+    pass
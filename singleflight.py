@@ -0,0 +1,97 @@
+import threading
+
+# Request coalescing: while a call for a key is in flight, identical calls wait
+# for it and share its result instead of going upstream again. Each key has its
+# own in-flight record, so waiters on one city never block another.
+#
+# The leader can publish progress (e.g. the partial forecast summary while it
+# streams); followers poll it so they can render the same progressive output.
+#
+# If the leader's script is stopped by a rerun, its followers don't see an error:
+# they retry, and one of them becomes the new leader.
+
+
+class FlightTimeout(Exception):
+    pass
+
+
+class FlightCancelled(Exception):
+    pass
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.followers = 0
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, on_progress=None, timeout=None, poll=0.1):
+        # Run fn(publish) once per key at a time; returns (result, shared), where
+        # shared is True when this caller waited on someone else's call
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.calls += 1
+                else:
+                    call.followers += 1
+                    self.coalesced += 1
+            if leader:
+                return self._lead(key, call, fn), False
+            try:
+                return self._follow(call, on_progress, timeout, poll), True
+            except FlightCancelled:
+                continue
+
+    def _lead(self, key, call, fn):
+        def publish(progress):
+            call.progress = progress
+
+        try:
+            call.result = fn(publish)
+            return call.result
+        except BaseException as e:
+            # A leader stopped by a rerun raises a BaseException; followers still need an error
+            call.error = e if isinstance(e, Exception) else FlightCancelled("in-flight request was cancelled")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _follow(self, call, on_progress, timeout, poll):
+        waited = 0.0
+        seen = None
+        while not call.done.wait(poll):
+            if on_progress is not None and call.progress is not None and call.progress is not seen:
+                seen = call.progress
+                on_progress(seen)
+            waited += poll
+            if timeout is not None and waited >= timeout:
+                raise FlightTimeout("timed out waiting for an identical in-flight request")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "waiting": sum(call.followers for call in self._calls.values()),
+            }
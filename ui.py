@@ -0,0 +1,125 @@
+import hashlib
+import os
+import random
+import time
+
+import streamlit as st
+
+import instrumentation
+
+# Page chrome shared by every page: CSS, titles, notifications, the weather fact
+# and the features footer.
+
+# Styles and the features footer are static files (static/, served by Streamlit
+# with ETag/Last-Modified), so a rerun sends a <link> and a CSS variable instead
+# of the whole stylesheet. The ?v= content hash busts browser caches on change.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+def static_url(name):
+    # Root-relative, under server.baseUrlPath when the app is served below a path
+    # prefix (st.iframe only takes "/"-prefixed paths, anything else is read as HTML)
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        version = hashlib.blake2b(f.read(), digest_size=4).hexdigest()
+    base = st.get_option("server.baseUrlPath").strip("/")
+    return f"{'/' + base if base else ''}/app/static/{name}?v={version}"
+
+
+STYLE_URL = static_url("style.css")
+FEATURES_URL = static_url("features.html")
+FEATURES_HEIGHT = 600
+
+WEATHER_FACTS = [
+    "Lightning strikes the Earth about 8.6 million times per day.",
+    "A hurricane can release energy equivalent to 10,000 nuclear bombs.",
+    "The fastest recorded wind speed on Earth is 253 mph, during a tropical cyclone in Australia.",
+    "Snow isn't actually white! Snow crystals are actually translucent.",
+    "The air around a lightning bolt can heat up to 50,000°F — five times hotter than the sun's surface!",
+    "Raindrops aren't tear-shaped. They're actually shaped more like tiny hamburger buns.",
+    "A single snowstorm can drop 39 million tons of snow.",
+    "The coldest temperature ever recorded on Earth was -128.6°F in Antarctica.",
+    "Wind doesn't make a sound until it blows against an object.",
+    "Clouds can weigh more than a million pounds."
+]
+
+
+def inject_css():
+    st.markdown(f"<link rel='stylesheet' href='{STYLE_URL}'>", unsafe_allow_html=True)
+
+
+def apply_theme():
+    # Called after the sidebar, so a theme picked in Settings applies on the same run
+    st.markdown(f"<style>:root {{ --theme-color: {st.session_state.theme_color}; }}</style>",
+                unsafe_allow_html=True)
+
+
+def init_session(profile):
+    if 'api_key_saved' not in st.session_state:
+        st.session_state.api_key_saved = False
+
+    if 'show_notification' not in st.session_state:
+        st.session_state.show_notification = False
+        st.session_state.notification_message = ""
+
+    if 'language' not in st.session_state:
+        st.session_state.language = "English"
+
+    # Drawn once per session, so unrelated reruns don't reshuffle the page
+    if 'weather_fact' not in st.session_state:
+        st.session_state.weather_fact = random.choice(WEATHER_FACTS) if random.random() < 0.7 else None
+
+    st.session_state.theme_color = profile["theme_color"]
+
+
+def show_notification(message):
+    st.session_state.show_notification = True
+    st.session_state.notification_message = message
+
+
+def main_title(text):
+    st.markdown(f"<div class='main-title'>{text}</div>", unsafe_allow_html=True)
+
+
+def render_response(placeholder, text):
+    placeholder.markdown(f"<div class='response-card'>{text}</div>", unsafe_allow_html=True)
+
+
+def updated_badge(updated_at, refreshing=False):
+    # Age of cached data (wall-clock timestamp); refreshing marks an expired entry
+    # being replaced in the background
+    minutes = int((time.time() - updated_at) // 60)
+    text = f"🕒 Updated {minutes} min ago" if minutes else "🕒 Updated just now"
+    if refreshing:
+        text += " · refreshing in the background"
+    st.caption(text)
+
+
+def plotly_chart(fig):
+    # Timed, since serializing the figure into the page is a large part of a rerun
+    with instrumentation.timed("plotly_chart"):
+        st.plotly_chart(fig, width="stretch")
+
+
+def weather_fact():
+    # Weather Fact of the Day, shown in 70% of sessions
+    if st.session_state.weather_fact:
+        with st.expander("🔍 Weather Fact of the Day", expanded=False):
+            st.info(st.session_state.weather_fact)
+
+
+def footer():
+    st.markdown("---")
+    with st.expander("✨ New Features"):
+        st.iframe(f"{FEATURES_URL}&theme={st.session_state.theme_color.lstrip('#')}", height=FEATURES_HEIGHT)
+
+    st.caption("✨ Powered by Gemini 2.0 Flash | Pro Edition | Dark Mode Activated 🌌")
+
+    # Show notifications if needed
+    if st.session_state.show_notification:
+        st.markdown(f"""
+            <div class='notification'>
+                {st.session_state.notification_message}
+            </div>
+        """, unsafe_allow_html=True)
+        # Reset notification after showing
+        st.session_state.show_notification = False
@@ -0,0 +1,182 @@
+import threading
+import time
+
+import instrumentation
+
+# Guards around the remote services, shared by every session in the process:
+# one for Nominatim, and one per Gemini API key since quotas are per key.
+#
+# - a token bucket per upstream, so the process as a whole stays within the
+#   upstream's rate limit (Nominatim's usage policy, the key's Gemini quota). A caller
+#   waits for a token at most max_wait seconds, then gets UpstreamUnavailable
+#   instead of tying up a script thread in a queue.
+# - a circuit breaker: after FAILURE_THRESHOLD consecutive failures the circuit
+#   opens and calls fail fast for RESET_TIMEOUT seconds; then a single probe call
+#   is let through, and its outcome closes or reopens the circuit. While a circuit
+#   is open, callers serve stale cached data where they have it.
+#
+# Health (circuit state, failures, fast-fails) is shown on the Diagnostics page
+# and exported with the other metrics.
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_lock = threading.Lock()
+_upstreams = {}
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst=1):
+        # rate in requests per second; 0 means unlimited
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        # Seconds to wait for a token (already taken), or None if that's longer than max_wait
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def available(self):
+        if not self.rate:
+            return None
+        with self._lock:
+            return min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            # One probe at a time; a probe that never reported back is replaced after a timeout
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            elif self.state == HALF_OPEN and now - self.probe_at < self.reset_timeout:
+                return False
+            if self.state == HALF_OPEN:
+                self.probe_at = now
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class Upstream:
+
+    def __init__(self, name, rate=0, burst=1, max_wait=5.0, failures=(Exception,),
+                 failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        # failures: exception types that count against the circuit (others, like a
+        # bad API key, are the caller's fault and leave it alone)
+        self.name = name
+        self.max_wait = max_wait
+        self.failures = failures
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.rejected = 0
+
+    def acquire(self):
+        # Call before each request: raises UpstreamUnavailable when the circuit is
+        # open or no token comes up within max_wait, otherwise waits for the token
+        if not self.breaker.allow():
+            self._reject("circuit_open")
+        wait = self.bucket.reserve(self.max_wait)
+        if wait is None:
+            self._reject("rate_limited")
+        if wait:
+            with instrumentation.timed(f"{self.name}.rate_wait"):
+                time.sleep(wait)
+
+    def _reject(self, reason):
+        self.rejected += 1
+        instrumentation.count("upstream_rejected", upstream=self.name, reason=reason)
+        raise UpstreamUnavailable(f"{self.name} unavailable ({reason.replace('_', ' ')})")
+
+    def success(self):
+        self.breaker.success()
+
+    def failure(self, error):
+        if isinstance(error, self.failures):
+            instrumentation.count("upstream_failures", upstream=self.name)
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+    def call(self, fn, *args, **kwargs):
+        self.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.failure(e)
+            raise
+        self.success()
+        return result
+
+    def health(self):
+        breaker = self.breaker
+        return {
+            "state": breaker.state,
+            "failures": breaker.failures,
+            "trips": breaker.trips,
+            "rejected": self.rejected,
+            "rate_per_s": self.bucket.rate or None,
+            "tokens": self.bucket.available(),
+        }
+
+
+def register(name, **options):
+    # Idempotent: one guard per upstream name, whichever module asks first
+    with _lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(name, **options)
+        return _upstreams[name]
+
+
+def health():
+    with _lock:
+        upstreams = dict(_upstreams)
+    return {name: upstream.health() for name, upstream in upstreams.items()}
@@ -0,0 +1,78 @@
+import math
+
+import folium
+
+from providers import UNIT_LABELS, convert_value
+
+# The base map and marker feature groups are built fresh for each render (a few
+# milliseconds): st_folium attaches the groups to the map it renders, so folium
+# objects can't be shared between sessions. st_folium only remounts the map when
+# the base map's script changes (folium's random ids aside), so switching location
+# just re-centers the existing map and swaps the feature groups instead of
+# re-sending the whole Leaflet document.
+
+TILES = "CartoDB dark_matter"
+DEFAULT_ZOOM = 10
+MIN_ZOOM = 4
+DEFAULT_CENTER = (35.6762, 139.6503)  # Tokyo
+OVERLAYS = ("location", "weather", "nearby")
+NEARBY_COUNT = 8
+
+
+def base_map(zoom=DEFAULT_ZOOM, tiles=TILES):
+    return folium.Map(location=DEFAULT_CENTER, zoom_start=zoom, tiles=tiles)
+
+
+def zoom_for(lat, distance_km, width_px=800):
+    # Web-Mercator zoom at which width_px spans about 2.5x distance_km around lat
+    span_km = max(2.5 * distance_km, 1.0)
+    ground_km = 40075.016686 * max(math.cos(math.radians(lat)), 0.01) * width_px / 256
+    return int(min(DEFAULT_ZOOM, max(MIN_ZOOM, math.floor(math.log2(ground_km / span_km)))))
+
+
+def build_layers(location, lat, lon, overlays, radius, nearby=(), units="metric"):
+    layers = []
+    if "location" in overlays:
+        group = folium.FeatureGroup(name="Location")
+        folium.Marker(
+            [lat, lon],
+            popup=f"<i>{location}</i>",
+            tooltip=location,
+            icon=folium.Icon(color="blue", icon="cloud")
+        ).add_to(group)
+        layers.append(group)
+    if "weather" in overlays:
+        # Circle to represent weather intensity
+        group = folium.FeatureGroup(name="Weather System")
+        folium.Circle(
+            radius=radius,
+            location=[lat, lon],
+            popup="Weather System",
+            color="#00ffe0",
+            fill=True,
+            fill_opacity=0.2
+        ).add_to(group)
+        layers.append(group)
+    if "nearby" in overlays and nearby:
+        # Nearest gazetteer cities with their current weather
+        group = folium.FeatureGroup(name="Nearby Areas")
+        labels = UNIT_LABELS[units]
+        for place in nearby:
+            popup = f"<b>{place['name']}</b><br>{place['distance_km']:.0f} km away"
+            weather = place["weather"]
+            if weather:
+                popup += (
+                    f"<br>{convert_value(weather['temp'], 'temp', units):.1f}{labels['temp']}"
+                    f", {weather['humidity']:.0f}% humidity"
+                    f"<br>Wind {convert_value(weather['wind_speed'], 'wind_speed', units):.0f} {labels['wind']}"
+                    f", rain {weather['precip_chance']:.0f}%"
+                )
+            folium.Marker(
+                [place["lat"], place["lon"]],
+                popup=folium.Popup(popup, max_width=250),
+                tooltip=place["name"],
+                icon=folium.Icon(color="green", icon="info-sign")
+            ).add_to(group)
+        layers.append(group)
+    return layers
+
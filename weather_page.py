@@ -0,0 +1,470 @@
+import itertools
+import time
+from functools import partial
+
+import streamlit as st
+
+import forecast
+import forecast_cache
+import geocoding
+import instrumentation
+import prompts
+import ui
+import upstream
+
+# Weather page. A submitted request and its forecast are kept in session state,
+# so reruns triggered elsewhere redraw the result without calling Gemini again.
+# Interactive panels are fragments: changing the language or moving the map
+# reruns only that panel, not the map and chart building around it.
+
+LANGUAGES = ["English", "Spanish", "French", "Japanese", "German"]
+
+def stream_forecast(model, prompt, placeholder, publish=None, generation_config=None, budget=None):
+    # Stream the JSON forecast, rendering the summary field as soon as it starts arriving
+    # (and publishing it to sessions coalesced onto this call).
+    # Returns the parsed Forecast and time-to-first-token.
+    import gemini_client
+
+    placeholder.markdown("<div class='loading-animation'>Retrieving weather data...</div>", unsafe_allow_html=True)
+    started = time.perf_counter()
+    with st.spinner("Waiting for the forecaster..."):
+        stream = iter(gemini_client.generate(
+            model, prompt, stream=True, budget=budget,
+            generation_config=generation_config or forecast.GENERATION_CONFIG,
+        ))
+        first_chunk = next(stream, None)
+    first_token_s = time.perf_counter() - started
+
+    chunks = []
+    if first_chunk is not None:
+        for chunk in itertools.chain([first_chunk], stream):
+            chunks.append(chunk.text)
+            summary = forecast.partial_summary("".join(chunks))
+            if summary:
+                ui.render_response(placeholder, summary)
+                if publish is not None:
+                    publish(summary)
+    weather = forecast.parse_forecast("".join(chunks))
+    ui.render_response(placeholder, weather.card_markdown())
+    return weather, first_token_s
+
+def aqi_status(aqi):
+    if aqi < 50:
+        return "Good", "green"
+    elif aqi < 100:
+        return "Moderate", "yellow"
+    elif aqi < 150:
+        return "Unhealthy for Sensitive Groups", "orange"
+    return "Unhealthy", "red"
+
+def fetch_air_quality(location):
+    import providers
+
+    air = providers.get_provider().air_quality([location])
+    if location not in air.index:
+        return None
+    row = air.loc[location].to_dict()
+    forecast_cache.put_air_quality(location, row)
+    return row
+
+def get_air_quality(location):
+    # Readings are cached per location (and kept warm for favourites by prefetch.py);
+    # an expired reading is shown while a background refresh replaces it
+    entry = forecast_cache.lookup_air_quality(location)
+    if entry is None:
+        row, age, refreshing = fetch_air_quality(location), 0, False
+        if row is None:
+            return None
+    else:
+        row, age, refreshing = entry
+        if refreshing:
+            forecast_cache.revalidate(("air_quality", geocoding.normalize_location(location)),
+                                      partial(fetch_air_quality, location))
+    aqi = int(row["aqi"])
+    pollutants = {name: value for name, value in row.items() if name != "aqi"}
+
+    status, color = aqi_status(aqi)
+
+    return {
+        "aqi": aqi,
+        "status": status,
+        "color": color,
+        "pollutants": pollutants,
+        "updated_at": time.time() - age,
+        "refreshing": refreshing,
+    }
+
+def translate_weather_phrase(phrase, target_language):
+    # Mock translation function - in a real app, you'd use a translation API
+    translations = {
+        "Sunny": {
+            "Spanish": "Soleado",
+            "French": "Ensoleillé",
+            "Japanese": "晴れ",
+            "German": "Sonnig"
+        },
+        "Cloudy": {
+            "Spanish": "Nublado",
+            "French": "Nuageux",
+            "Japanese": "曇り",
+            "German": "Bewölkt"
+        },
+        "Rainy": {
+            "Spanish": "Lluvioso",
+            "French": "Pluvieux",
+            "Japanese": "雨",
+            "German": "Regnerisch"
+        }
+    }
+
+    if phrase in translations and target_language in translations[phrase]:
+        return translations[phrase][target_language]
+    return phrase
+
+# FEATURE 2: Animated Weather Map
+@instrumentation.timer("map_build")
+def create_weather_map(location, weather=None, units="metric"):
+    import nearby
+    import weather_map
+
+    lat, lon = geocoding.get_coordinates(location)
+    if not lat or not lon:
+        lat, lon = weather_map.DEFAULT_CENTER  # Default to Tokyo if location not found
+
+    # Weather system radius follows the forecast's precipitation chance
+    radius = 10000
+    if weather is not None and weather.precip_chance is not None:
+        radius = 5000 + 150 * max(0, min(100, weather.precip_chance))
+
+    # Real surrounding weather from the nearest gazetteer cities
+    nearby_places = nearby.nearby_weather(lat, lon, weather_map.NEARBY_COUNT)
+    layers = weather_map.build_layers(location, lat, lon, weather_map.OVERLAYS, radius, nearby_places, units)
+    # Zoom out far enough to show the closest few neighbours
+    zoom = weather_map.DEFAULT_ZOOM
+    if nearby_places:
+        zoom = weather_map.zoom_for(lat, nearby_places[min(2, len(nearby_places) - 1)]["distance_km"])
+    return weather_map.base_map(), layers, (lat, lon), zoom
+
+@st.fragment
+def show_weather_map(location, weather=None, units="metric"):
+    # A stable key lets the component re-center and swap layers without reloading
+    # Leaflet on every rerun
+    from streamlit_folium import st_folium
+
+    m, layers, center, zoom = create_weather_map(location, weather, units)
+    with instrumentation.timed("map_render"):
+        st_folium(
+            m,
+            key="weather_map",
+            center=center,
+            zoom=zoom,
+            feature_group_to_add=layers,
+            returned_objects=[],
+            width=800,
+            height=500,
+        )
+
+def set_language():
+    st.session_state.language = st.session_state.language_choice
+
+# FEATURE 10: Language Translation
+@st.fragment
+def show_translation(weather):
+    # The language only affects this panel, so picking one reruns just the fragment
+    st.selectbox("Language", LANGUAGES, index=LANGUAGES.index(st.session_state.language),
+                 key="language_choice", on_change=set_language)
+    if st.session_state.language != "English":
+        st.markdown("#### Translation")
+        # Translate the key phrase for the forecast condition
+        if weather.phrase:
+            translated = translate_weather_phrase(weather.phrase, st.session_state.language)
+            st.write(f"{weather.phrase} → {translated}")
+
+def sidebar(profile):
+    st.title("🌙 AI Weather Pro")
+
+    # FEATURE 3: API Key Management & Memory
+    api_key = ""
+    if not st.session_state.api_key_saved:
+        api_key = st.text_input("Enter Gemini API Key", type="password")
+        save_key = st.checkbox("Remember this API key")
+        if save_key and api_key:
+            st.session_state.api_key = api_key
+            st.session_state.api_key_saved = True
+            ui.show_notification("API key saved successfully!")
+    else:
+        st.success("API key is saved ✓")
+        if st.button("Clear saved API key"):
+            st.session_state.api_key_saved = False
+            st.session_state.api_key = ""
+            st.rerun()
+
+    # FEATURE 4: Enhanced Location Selector with Favorites
+    location_options = [""] + profile["favorite_locations"] + ["Custom"]
+    location_choice = st.selectbox("Select location", location_options)
+
+    if location_choice == "Custom":
+        location = st.text_input("Enter location", placeholder="Tokyo, Berlin, etc.")
+        if location and location not in profile["favorite_locations"]:
+            if st.button("Add to favorites"):
+                profile["favorite_locations"].append(location)
+                ui.show_notification(f"Added {location} to favorites!")
+    elif location_choice:
+        location = location_choice
+    else:
+        location = ""
+
+    # Time frame selector with more options
+    time_frame = st.selectbox("Select time frame", prompts.TIME_FRAMES)
+
+    show_details = st.checkbox("Show detailed information", value=True)
+
+    # FEATURE 5: Units Toggle
+    units = st.radio("Units", ["Metric (°C)", "Imperial (°F)"],
+                    index=0 if profile["preferred_units"] == "metric" else 1)
+    profile["preferred_units"] = "metric" if units.startswith("Metric") else "imperial"
+
+    # Submit button with animation
+    submit = st.button("Get Weather Info", width="stretch")
+
+    return {
+        "api_key": st.session_state.api_key if st.session_state.api_key_saved else api_key,
+        "location": location,
+        "time_frame": time_frame,
+        "detail_level": "detailed" if show_details else "brief",
+        "units": profile["preferred_units"],
+        "submit": submit,
+    }
+
+def revalidate_forecast(request, api_key, cache_key):
+    # Background refresh of an expired forecast (at most one per cache key at a time)
+    import forecast_service
+    import gemini_client
+
+    forecast_cache.revalidate(cache_key, partial(
+        forecast_service.get_forecast, gemini_client.get_model(api_key), request["location"],
+        request["time_frame"], request["units"], request["detail_level"], refresh=True,
+    ))
+
+def get_weather(request, api_key, placeholder):
+    # The session's forecast for the submitted request, else the shared cache, else Gemini.
+    # An expired cache entry (within its hard expiry) is shown at once, with its age,
+    # while a background refresh replaces it.
+    weather = st.session_state.get("weather_result")
+    if weather is not None and st.session_state.get("weather_refreshing"):
+        entry = forecast_cache.lookup(st.session_state.weather_key)
+        if entry is None:
+            # Past its hard expiry (or evicted) before a refresh landed: fetch it again
+            weather = st.session_state.weather_result = None
+        elif entry[2]:
+            # Still expired, e.g. the refresh failed: try again
+            revalidate_forecast(request, api_key, st.session_state.weather_key)
+        else:
+            # Pick up the background refresh once it has landed
+            weather, age, _ = entry
+            st.session_state.weather_result = weather
+            st.session_state.weather_updated = time.time() - age
+            st.session_state.weather_refreshing = False
+    if weather is not None:
+        ui.render_response(placeholder, weather.card_markdown())
+        ui.updated_badge(st.session_state.weather_updated, st.session_state.weather_refreshing)
+        return weather
+
+    import forecast_service
+    import gemini_client
+
+    cache_key, prompt, config = forecast_service.forecast_request(
+        request["location"], request["time_frame"], request["units"], request["detail_level"]
+    )
+    # Reuses the configured model and its connection across reruns and sessions
+    model = gemini_client.get_model(api_key)
+    # Serve repeated questions from the shared forecast cache, otherwise stream the answer
+    entry = forecast_cache.lookup(cache_key)
+    refreshing = False
+    if entry is None:
+        # Sessions asking the same question at the same time share one call
+        def fetch_forecast(publish):
+            budget = prompts.budget_label(request["time_frame"], request["detail_level"])
+            result = stream_forecast(model, prompt, placeholder, publish, config, budget)
+            forecast_cache.put(cache_key, result[0], budget)
+            return result
+
+        age = 0
+        try:
+            (weather, first_token_s), shared = forecast_cache.flights.do(
+                cache_key,
+                fetch_forecast,
+                on_progress=lambda summary: ui.render_response(placeholder, summary),
+                timeout=gemini_client.REQUEST_TIMEOUT + gemini_client.RETRY_DEADLINE,
+            )
+        except upstream.UpstreamUnavailable:
+            # Gemini is over its rate limit or failing: an older forecast beats an error
+            entry = forecast_cache.lookup(cache_key, stale_ok=True)
+            if entry is None:
+                raise
+            weather, age, _ = entry
+            ui.render_response(placeholder, weather.card_markdown())
+            st.warning("The forecast service is busy or unavailable, showing an earlier forecast.")
+        else:
+            if shared:
+                ui.render_response(placeholder, weather.card_markdown())
+                st.caption("Shared an identical in-flight request")
+            else:
+                st.caption(f"First token after {first_token_s:.2f}s")
+    else:
+        weather, age, refreshing = entry
+        ui.render_response(placeholder, weather.card_markdown())
+        if refreshing:
+            revalidate_forecast(request, api_key, cache_key)
+    st.session_state.weather_result = weather
+    st.session_state.weather_key = cache_key
+    st.session_state.weather_updated = time.time() - age
+    st.session_state.weather_refreshing = refreshing
+    ui.updated_badge(st.session_state.weather_updated, refreshing)
+    return weather
+
+def show_charts(weather, units):
+    import charts
+
+    # Charts come straight from the structured forecast, no extra model call
+    temp_labels, temp_values = weather.temperature_series()
+    precip_labels, precip_values = weather.precip_series()
+    if not temp_values:
+        st.info("No numeric forecast data available for this location.")
+
+    # Create temperature chart
+    fig_temp = charts.line_chart(
+        temp_labels,
+        temp_values,
+        title="Temperature Forecast",
+        xaxis_title="Day" if weather.daily else "Time",
+        yaxis_title=f"Temperature (°{'F' if units == 'imperial' else 'C'})",
+        name='Temperature',
+        color=st.session_state.theme_color,
+        marker_size=10,
+        margin=charts.DEFAULT_MARGIN,
+    )
+
+    ui.plotly_chart(fig_temp)
+
+    # Create precipitation chart
+    fig_precip = charts.bar_chart(
+        precip_labels,
+        precip_values,
+        title="Precipitation Probability",
+        xaxis_title="Day" if weather.daily else "Time",
+        yaxis_title="Probability (%)",
+        name='Precipitation Chance',
+        height=350,
+        margin=charts.DEFAULT_MARGIN,
+    )
+
+    ui.plotly_chart(fig_precip)
+
+def show_air_quality(location):
+    import charts
+
+    # Measured AQI from the weather provider
+    air_data = get_air_quality(location)
+    if air_data is None:
+        st.info("No air quality data available for this location.")
+        return
+
+    ui.updated_badge(air_data["updated_at"], air_data["refreshing"])
+
+    # Display AQI gauge
+    fig_gauge = charts.aqi_gauge(air_data["aqi"], air_data["color"], location)
+    ui.plotly_chart(fig_gauge)
+
+    # Display AQI status
+    st.markdown(f"<div style='text-align: center; font-size: 1.5rem; margin-bottom: 20px;'>Status: <span style='color: {air_data['color']};'>{air_data['status']}</span></div>", unsafe_allow_html=True)
+
+    # Display pollutant levels
+    st.subheader("Pollutant Levels")
+
+    fig_pollutants = charts.bar_chart(
+        list(air_data["pollutants"].keys()),
+        list(air_data["pollutants"].values()),
+        color=charts.POLLUTANT_COLORS,
+        height=350,
+        margin=charts.DEFAULT_MARGIN,
+    )
+
+    ui.plotly_chart(fig_pollutants)
+
+    # Health recommendations based on AQI
+    st.subheader("Health Recommendations")
+    if air_data["status"] == "Good":
+        st.success("Air quality is good. Enjoy outdoor activities!")
+    elif air_data["status"] == "Moderate":
+        st.info("Air quality is acceptable. Unusually sensitive people should consider reducing prolonged outdoor exertion.")
+    elif air_data["status"] == "Unhealthy for Sensitive Groups":
+        st.warning("Members of sensitive groups may experience health effects. The general public is less likely to be affected.")
+    else:
+        st.error("Everyone may begin to experience health effects. Members of sensitive groups may experience more serious health effects.")
+
+def main(profile, state):
+    # Main Title with theme color
+    ui.main_title("🌙 AI Weather Assistant Pro")
+
+    if not state["api_key"]:
+        st.info("Please enter your Gemini API key in the sidebar to start.")
+        return
+    if state["submit"] and state["location"]:
+        st.session_state.weather_request = {
+            key: state[key] for key in ("location", "time_frame", "detail_level", "units")
+        }
+        st.session_state.weather_result = None
+
+    request = st.session_state.get("weather_request")
+    if request is None:
+        if not state["location"]:
+            st.info("Select or enter a location in the sidebar to get weather information.")
+        return
+
+    location = request["location"]
+    try:
+        # FEATURE 9: Weather Visualization System
+        # Create tabs for different views
+        tab1, tab2, tab3, tab4 = st.tabs(["Forecast", "Map", "Charts", "Air Quality"])
+
+        with tab1:
+            st.subheader(f"📍 {location} — {request['time_frame']}")
+            weather = get_weather(request, state["api_key"], st.empty())
+
+            # Weather emoji display
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                st.markdown("<div class='emoji-card'>", unsafe_allow_html=True)
+                st.caption("Weather visual")
+
+                st.markdown(f"<h1 style='font-size: 6rem'>{weather.emoji}</h1>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+
+                st.markdown("---")
+                show_translation(weather)
+
+        with tab2:
+            st.subheader(f"Weather Map: {location}")
+
+            # Display weather map
+            show_weather_map(location, weather, request["units"])
+
+            st.caption("Map shows the approximate weather system and current weather in nearby cities")
+
+        with tab3:
+            st.subheader("Weather Forecast Charts")
+            show_charts(weather, request["units"])
+
+        with tab4:
+            st.subheader("Air Quality Index")
+            show_air_quality(location)
+
+    except Exception as e:
+        # Forget the failed request so the next rerun doesn't retry it unasked
+        st.session_state.weather_request = None
+        st.error(f"An error occurred: {str(e)}")
+        if "403" in str(e) or "401" in str(e):
+            st.error("API key error. Please check your Gemini API key.")
+        elif "429" in str(e) or isinstance(e, upstream.UpstreamUnavailable):
+            st.error("Rate limit exceeded. Please try again later.")